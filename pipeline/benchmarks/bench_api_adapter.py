@@ -0,0 +1,104 @@
+"""
+Benchmark API fetches against a local test server that answers after 20 ms:
+the blocking requests session the ApiAdapter used to create per fetch,
+against the shared pooled async HttpClient. Fetches run concurrently, like
+the sources of a run; a probe task records event loop lag meanwhile. Run
+from the pipeline directory:
+
+    python -m benchmarks.bench_api_adapter
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ingestion.adapters.api_adapter import ApiAdapter
+from ingestion.http_client import HttpClient
+
+FETCHES = 200
+SERVER_DELAY_SEC = 0.02
+PROBE_SEC = 0.01
+BODY = json.dumps([{"id": i, "name": f"house-{i}"} for i in range(50)]).encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        time.sleep(SERVER_DELAY_SEC)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def fetch_blocking(url: str) -> list:
+    """The earlier ApiAdapter.fetch: a new session per fetch, blocking the loop."""
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[500, 502, 503, 504])
+    session.mount("http://", HTTPAdapter(max_retries=retries))
+    try:
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        return response.json()
+    finally:
+        session.close()
+
+
+async def fetch_pooled(url: str, client: HttpClient) -> list:
+    return await ApiAdapter(url=url, client=client).fetch()
+
+
+async def probe(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_SEC)
+        lags.append(time.perf_counter() - start - PROBE_SEC)
+
+
+async def measure(fetch) -> tuple[float, float, float]:
+    lags, stop = [], asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(PROBE_SEC)
+    start = time.perf_counter()
+    await asyncio.gather(*(fetch() for _ in range(FETCHES)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    lags_ms = np.array(lags) * 1000
+    return FETCHES / elapsed, np.percentile(lags_ms, 99), lags_ms.max()
+
+
+async def main() -> None:
+    logger.remove()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/houses"
+    client = HttpClient(max_connections_per_host=20)
+    try:
+        print(f"{'client':>10} {'fetch/s':>8} {'p99 lag ms':>11} {'max lag ms':>11}")
+        for name, fetch in (
+            ("requests", lambda: fetch_blocking(url)),
+            ("pooled", lambda: fetch_pooled(url, client)),
+        ):
+            rate, p99, worst = await measure(fetch)
+            print(f"{name:>10} {rate:>8.1f} {p99:>11.1f} {worst:>11.1f}")
+    finally:
+        await client.aclose()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+Benchmark HeapDispatcher against one APScheduler DateTrigger job per pipeline.
+
+For each pipeline count, measures adding every pipeline, a reconciliation-style
+reschedule of every pipeline, cancelling every pipeline, and (in a separate
+traced pass) the memory held while all pipelines are scheduled. Run from the
+pipeline directory:
+
+    python -m benchmarks.bench_dispatcher
+"""
+
+import asyncio
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.date import DateTrigger
+from loguru import logger
+
+from scheduler.dispatcher import HeapDispatcher
+
+PIPELINE_COUNTS = [10_000, 100_000]
+
+
+async def noop(pipeline_id) -> None:
+    pass
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(add, reschedule, cancel, trace: bool) -> dict:
+    """Time the three phases, or (with trace) only measure memory after add."""
+    if trace:
+        tracemalloc.start()
+        add()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        cancel()
+        return {"memory": memory}
+    return {"add": timed(add), "reschedule": timed(reschedule), "cancel": timed(cancel)}
+
+
+def bench_apscheduler(ids, run_times, new_run_times, trace: bool) -> dict:
+    scheduler = AsyncIOScheduler(
+        jobstores={"default": MemoryJobStore()},
+        executors={"default": AsyncIOExecutor()},
+        timezone=timezone.utc,
+    )
+    scheduler.start()
+
+    def add():
+        for pipeline_id, run_at in zip(ids, run_times):
+            scheduler.add_job(
+                noop,
+                trigger=DateTrigger(run_date=run_at),
+                args=[pipeline_id],
+                id=str(pipeline_id),
+                replace_existing=True,
+            )
+
+    def reschedule():
+        # what schedule_pipeline does per pipeline on each reconciliation
+        for pipeline_id, run_at in zip(ids, new_run_times):
+            job_id = str(pipeline_id)
+            job = scheduler.get_job(job_id)
+            trigger = DateTrigger(run_date=run_at)
+            if job.trigger != trigger:
+                scheduler.reschedule_job(job_id, trigger=trigger)
+
+    def cancel():
+        for pipeline_id in ids:
+            scheduler.remove_job(str(pipeline_id))
+
+    result = run(add, reschedule, cancel, trace)
+    scheduler.shutdown(wait=False)
+    return result
+
+
+def bench_heap(ids, run_times, new_run_times, trace: bool) -> dict:
+    dispatcher = HeapDispatcher(callback=noop)
+
+    def add():
+        for pipeline_id, run_at in zip(ids, run_times):
+            dispatcher.schedule(pipeline_id, run_at)
+
+    def reschedule():
+        for pipeline_id, run_at in zip(ids, new_run_times):
+            dispatcher.schedule(pipeline_id, run_at)
+
+    def cancel():
+        for pipeline_id in ids:
+            dispatcher.cancel(pipeline_id)
+
+    return run(add, reschedule, cancel, trace)
+
+
+async def main() -> None:
+    logger.remove()
+    print(
+        f"{'pipelines':>10} {'backend':>12} {'add ms':>10} {'reschedule ms':>14} "
+        f"{'cancel ms':>10} {'memory MB':>10}"
+    )
+    base = datetime.now(timezone.utc) + timedelta(days=1)
+    for count in PIPELINE_COUNTS:
+        ids = [uuid4() for _ in range(count)]
+        run_times = [base + timedelta(seconds=i % 86_400) for i in range(count)]
+        new_run_times = [t + timedelta(minutes=5) for t in run_times]
+        for name, bench in (("apscheduler", bench_apscheduler), ("heap", bench_heap)):
+            result = bench(ids, run_times, new_run_times, trace=False)
+            result |= bench(ids, run_times, new_run_times, trace=True)
+            print(
+                f"{count:>10} {name:>12} {result['add'] * 1000:>10.1f} "
+                f"{result['reschedule'] * 1000:>14.1f} {result['cancel'] * 1000:>10.1f} "
+                f"{result['memory'] / 1e6:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+Benchmark FileAdapter on a 1M-row CSV upload: the earlier read_csv +
+DataFrame.iterrows loop, against the chunked pandas reader and the pyarrow
+reader. "fetch" collects every record, as a run does; "batches" drops each
+chunk once converted, as a consumer of FileAdapter.batches() that writes
+records out would. Each case runs in a fresh process so its peak RSS is its
+own; "start" is the peak before parsing, with the upload in memory. Run from
+the pipeline directory:
+
+    python -m benchmarks.bench_file_adapter
+"""
+
+import asyncio
+import io
+import multiprocessing
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi import UploadFile
+from loguru import logger
+
+from ingestion.adapters import file_adapter
+from ingestion.adapters.file_adapter import FileAdapter
+from models.ingestion import AdapterRecord
+
+ROWS = 1_000_000
+
+
+def csv_bytes(rows: int) -> bytes:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "id": np.arange(rows),
+            "name": [f"house-{i}" for i in range(rows)],
+            "price": rng.integers(500_000, 20_000_000, rows),
+            "area": rng.random(rows).round(2) * 300,
+            "listed": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        }
+    )
+    return df.to_csv(index=False).encode()
+
+
+def iterrows_fetch(upload: UploadFile) -> int:
+    """The FileAdapter.fetch loop before chunked reading."""
+    df = pd.read_csv(upload.file)
+    records = [
+        AdapterRecord(source=upload.filename, data=row.to_dict())
+        for _, row in df.iterrows()
+    ]
+    return len(records)
+
+
+async def adapter_run(upload: UploadFile, collect: bool) -> int:
+    adapter = FileAdapter(upload)
+    if collect:
+        return len(await adapter.fetch())
+    count = 0
+    async for batch in adapter.batches():
+        count += len(batch)
+    return count
+
+
+def run_case(case: str, data: bytes, results) -> None:
+    logger.remove()
+    upload = UploadFile(io.BytesIO(data), filename="houses.csv")
+    reader, mode = case.split()
+    file_adapter.PYARROW_AVAILABLE = reader == "pyarrow"
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if reader == "iterrows":
+        count = iterrows_fetch(upload)
+    else:
+        count = asyncio.run(adapter_run(upload, collect=mode == "fetch"))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((count, elapsed, baseline / 1024, peak / 1024))
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    data = csv_bytes(rows)
+    print(f"{len(data) / 2**20:.1f} MiB CSV, {rows} rows")
+    cases = ["iterrows fetch", "pandas fetch", "pandas batches"]
+    if file_adapter.PYARROW_AVAILABLE:
+        cases += ["pyarrow fetch", "pyarrow batches"]
+    context = multiprocessing.get_context("spawn")
+    print(f"{'case':>16} {'rows/s':>10} {'seconds':>8} {'start MiB':>10} {'peak MiB':>9}")
+    for case in cases:
+        results = context.Queue()
+        process = context.Process(target=run_case, args=(case, data, results))
+        process.start()
+        count, elapsed, start, peak = results.get()
+        process.join()
+        assert count == rows, case
+        print(
+            f"{case:>16} {rows / elapsed:>10.0f} {elapsed:>8.2f} {start:>10.0f} {peak:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark peak memory and time of an API source returning a large JSON list:
+decoding the whole response, against streaming it in batches of records. The
+records are dropped as they arrive, as a consumer of ApiAdapter.pages() that
+writes them out would. Memory is measured with tracemalloc. Run from the
+pipeline directory:
+
+    python -m benchmarks.bench_json_stream
+"""
+
+import asyncio
+import json
+import time
+import tracemalloc
+
+import httpx
+from loguru import logger
+
+from ingestion.adapters.api_adapter import ApiAdapter
+from ingestion.http_client import HttpClient
+from models.ingestion import StreamConfig
+
+ITEMS = 200_000
+CHUNK = 64 * 1024
+ITEM = {"id": 0, "name": "house", "price": 1_250_000.5, "tags": ["a", "b"]}
+
+
+def body() -> bytes:
+    items = ({**ITEM, "id": i} for i in range(ITEMS))
+    return ("[" + ",".join(json.dumps(item) for item in items) + "]").encode()
+
+
+def handler(data: bytes):
+    async def chunks():
+        for start in range(0, len(data), CHUNK):
+            yield data[start : start + CHUNK]
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=chunks())
+
+    return respond
+
+
+async def measure(stream: StreamConfig | None, data: bytes) -> tuple[int, float, int]:
+    client = HttpClient(transport=httpx.MockTransport(handler(data)))
+    adapter = ApiAdapter(url="http://bench/houses", client=client, stream=stream)
+    records = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    async for page in adapter.pages():
+        records += len(page)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    await client.aclose()
+    return records, elapsed, peak
+
+
+async def main() -> None:
+    logger.remove()
+    data = body()
+    print(f"body: {len(data) / 2**20:.1f} MiB, {ITEMS} items")
+    print(f"{'mode':>16} {'records':>8} {'seconds':>8} {'peak MiB':>9}")
+    for name, stream in (
+        ("whole", None),
+        ("stream 1000", StreamConfig(batch_size=1000)),
+        ("stream 10000", StreamConfig(batch_size=10000)),
+    ):
+        records, elapsed, peak = await measure(stream, data)
+        print(f"{name:>16} {records:>8} {elapsed:>8.2f} {peak / 2**20:>9.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
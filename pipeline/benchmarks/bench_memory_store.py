@@ -0,0 +1,86 @@
+"""
+Benchmark InMemoryPipelineStore.get_all against pipeline count and run output size.
+
+Compares the snapshot store with the previous behaviour of deep-copying every
+pipeline on read. Run outputs live in the ResultStore, so a pipeline only
+carries a RunResultRef whatever the output size. Run from the pipeline directory:
+
+    python -m benchmarks.bench_memory_store
+"""
+
+import asyncio
+import time
+from uuid import uuid4
+
+from loguru import logger
+
+from models.ingestion import (
+    ApiConfig,
+    IngestorInput,
+    IngestSourceConfig,
+    SourceType,
+)
+from models.pipeline import Pipeline, PipelineConfig, RunFrequency, RunResultRef
+from stores.memory import InMemoryPipelineStore
+
+PIPELINE_COUNTS = [100, 1_000, 2_000]
+OUTPUT_SIZES = [0, 100, 1_000]
+REPEAT = 3
+
+
+def make_pipeline(output_size: int) -> Pipeline:
+    return Pipeline(
+        id=uuid4(),
+        name="bench",
+        description="benchmark pipeline",
+        config=PipelineConfig(
+            ingestor_config=IngestorInput(
+                sources=[
+                    IngestSourceConfig(
+                        type=SourceType.API,
+                        config=ApiConfig(url="http://example.com/api"),
+                    )
+                ]
+            ),
+            run_frequency=RunFrequency.DAILY,
+        ),
+        latest_result=(
+            RunResultRef(
+                run_id=uuid4(), record_count=output_size, byte_size=output_size * 40
+            )
+            if output_size
+            else None
+        ),
+    )
+
+
+async def main() -> None:
+    logger.remove()
+    print(f"{'pipelines':>10} {'records':>8} {'snapshot ms':>12} {'deep copy ms':>13}")
+    for output_size in OUTPUT_SIZES:
+        template = make_pipeline(output_size)
+        for count in PIPELINE_COUNTS:
+            store = InMemoryPipelineStore()
+            for _ in range(count):
+                await store.save(template.model_copy(update={"id": uuid4()}))
+
+            timings = []
+            for _ in range(REPEAT):
+                start = time.perf_counter()
+                await store.get_all()
+                timings.append(time.perf_counter() - start)
+            snapshot = min(timings)
+
+            # previous behaviour: a deep copy of every pipeline on each read
+            stored = list(store._pipelines.values())
+            start = time.perf_counter()
+            [p.model_copy(deep=True) for p in stored]
+            deep_copy = time.perf_counter() - start
+
+            print(
+                f"{count:>10} {output_size:>8} {snapshot * 1000:>12.3f} {deep_copy * 1000:>13.3f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+"""
+Benchmark parsing a stored CSV upload into rows: in the run's own thread,
+against CsvParsePool with 2, 4, ... workers up to the number of CPUs. The
+rows are dropped once yielded; the parse cache is cleared between cases.
+Run from the pipeline directory:
+
+    python -m benchmarks.bench_parallel_csv [rows]
+"""
+
+import asyncio
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from loguru import logger
+
+from benchmarks.bench_file_adapter import csv_bytes
+from ingestion.adapters.file_adapter import FileAdapter
+from ingestion.parallel_csv import CsvParsePool
+from stores.blobs import BlobStore
+
+ROWS = 1_000_000
+
+
+async def parse(blobs: BlobStore, blob_id: str, pool: CsvParsePool | None) -> int:
+    adapter = FileAdapter(
+        blob_id=blob_id, filename="houses.csv", blobs=blobs, parse_pool=pool
+    )
+    count = 0
+    async for batch in adapter.batches():
+        count += len(batch)
+    return count
+
+
+def main() -> None:
+    logger.remove()
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    base_dir = tempfile.mkdtemp(prefix="bench-blobs-")
+    try:
+        blobs = BlobStore(base_dir)
+        blob_id, size = blobs.write(io.BytesIO(csv_bytes(rows)))
+        print(f"{size / 2**20:.1f} MiB CSV, {rows} rows, {os.cpu_count()} CPUs")
+        cases: list[int] = [1]
+        while cases[-1] * 2 <= max(os.cpu_count() or 1, 2):
+            cases.append(cases[-1] * 2)
+        print(f"{'workers':>8} {'rows/s':>10} {'seconds':>8}")
+        for workers in cases:
+            # ranges small enough to keep every worker busy
+            range_bytes = max(size // (workers * 4), 1)
+            pool = CsvParsePool(workers, range_bytes) if workers > 1 else None
+            if pool is not None:
+                asyncio.run(parse(blobs, blob_id, pool))  # start the workers
+            for path in blobs.path(blob_id).parent.glob("*.rows"):
+                path.unlink()
+            start = time.perf_counter()
+            count = asyncio.run(parse(blobs, blob_id, pool))
+            elapsed = time.perf_counter() - start
+            assert count == rows
+            if pool is not None:
+                pool.shutdown()
+            for path in blobs.path(blob_id).parent.glob("*.rows"):
+                path.unlink()
+            print(f"{workers:>8} {rows / elapsed:>10.0f} {elapsed:>8.2f}")
+    finally:
+        shutil.rmtree(base_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark event loop latency while a CPU-heavy run (a large CSV upload) is
+executing, with runs on the event loop and in a ProcessRunExecutor. A probe
+task stands in for API requests: it sleeps for 10 ms in a loop and records
+how late it wakes up. Run from the pipeline directory:
+
+    python -m benchmarks.bench_run_executor
+"""
+
+import asyncio
+import io
+import tempfile
+import time
+
+import numpy as np
+from fastapi import UploadFile
+from loguru import logger
+
+from models.ingestion import FileConfig, IngestorInput, IngestSourceConfig, SourceType
+from models.pipeline import RunFrequency
+from services.pipeline_service import PipelineService
+from services.run_executor import ProcessRunExecutor
+from stores.file_results import FileResultStore
+from stores.memory import InMemoryPipelineStore
+
+CSV_ROWS = 200_000
+PROBE_SEC = 0.01
+
+
+def make_csv() -> bytes:
+    lines = ["id,name,price,area"] + [
+        f"{i},house-{i},{i * 1000},{i % 300}" for i in range(CSV_ROWS)
+    ]
+    return "\n".join(lines).encode()
+
+
+async def probe(lags: list, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_SEC)
+        lags.append(time.perf_counter() - start - PROBE_SEC)
+
+
+async def measure(data: bytes, executor: ProcessRunExecutor | None, results: str):
+    store = InMemoryPipelineStore()
+    service = PipelineService(
+        store=store,
+        result_store=FileResultStore(base_dir=results),
+        run_executor=executor,
+    )
+    upload = UploadFile(io.BytesIO(data), filename="houses.csv")
+    pipeline = await service.create_pipeline(
+        name="bench",
+        description="bench",
+        ingestor_config=IngestorInput(
+            sources=[
+                IngestSourceConfig(
+                    type=SourceType.FILE, config=FileConfig(upload=upload)
+                )
+            ]
+        ),
+        run_frequency=RunFrequency.DAILY,
+    )
+    lags, stop = [], asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(PROBE_SEC)  # let the probe start its first sleep
+    start = time.perf_counter()
+    await service.run_pipeline(pipeline.id)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    lags_ms = np.array(lags) * 1000
+    return elapsed, np.percentile(lags_ms, 99), lags_ms.max()
+
+
+async def main() -> None:
+    logger.remove()
+    data = make_csv()
+    with tempfile.TemporaryDirectory() as results:
+        executor = ProcessRunExecutor(
+            FileResultStore(base_dir=results), max_workers=1, log_level="WARNING"
+        )
+        executor.start()
+        try:
+            # warm up the worker (spawn + imports) outside the measurement
+            await measure(b"id\n1", executor, results)
+            print(
+                f"{'executor':>10} {'run s':>8} {'p99 lag ms':>11} {'max lag ms':>11}"
+            )
+            for name, run_executor in (("inline", None), ("process", executor)):
+                elapsed, p99, worst = await measure(data, run_executor, results)
+                print(f"{name:>10} {elapsed:>8.2f} {p99:>11.1f} {worst:>11.1f}")
+        finally:
+            executor.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
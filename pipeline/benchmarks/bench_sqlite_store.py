@@ -0,0 +1,88 @@
+"""
+Benchmark SqlitePipelineStore startup and full load with many pipelines.
+
+Run from the pipeline directory:
+
+    python -m benchmarks.bench_sqlite_store [pipeline_count]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import uuid4
+
+from loguru import logger
+
+from models.ingestion import ApiConfig, IngestorInput, IngestSourceConfig, SourceType
+from models.pipeline import Pipeline, PipelineConfig, RunFrequency
+from stores.sqlite import SqlitePipelineStore
+
+DEFAULT_COUNT = 100_000
+
+
+def make_pipeline(i: int, now: datetime) -> Pipeline:
+    return Pipeline(
+        id=uuid4(),
+        name=f"bench-{i}",
+        description="benchmark pipeline",
+        config=PipelineConfig(
+            ingestor_config=IngestorInput(
+                sources=[
+                    IngestSourceConfig(
+                        type=SourceType.API,
+                        config=ApiConfig(url=f"http://example.com/api/{i}"),
+                    )
+                ]
+            ),
+            run_frequency=RunFrequency.DAILY,
+            next_run=now + timedelta(seconds=i),
+        ),
+    )
+
+
+async def main(count: int) -> None:
+    logger.remove()
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.db")
+        store = SqlitePipelineStore(path=path)
+        await store.connect()
+
+        pipelines = [make_pipeline(i, now) for i in range(count)]
+        start = time.perf_counter()
+
+        def _bulk_insert(conn):
+            conn.execute("BEGIN")
+            for pipeline in pipelines:
+                store._write(conn, pipeline)
+            conn.execute("COMMIT")
+
+        await store._run(_bulk_insert)
+        print(f"insert {count} pipelines: {time.perf_counter() - start:.3f}s")
+
+        start = time.perf_counter()
+        for pipeline in pipelines[:1000]:
+            await store.save(pipeline)
+        print(f"1000 single saves: {time.perf_counter() - start:.3f}s")
+        await store.disconnect()
+
+        store = SqlitePipelineStore(path=path)
+        start = time.perf_counter()
+        await store.connect()
+        print(f"connect (startup): {time.perf_counter() - start:.3f}s")
+
+        start = time.perf_counter()
+        loaded = await store.get_all()
+        print(f"get_all {len(loaded)} pipelines (cold): {time.perf_counter() - start:.3f}s")
+
+        start = time.perf_counter()
+        loaded = await store.get_all()
+        print(f"get_all {len(loaded)} pipelines (warm): {time.perf_counter() - start:.3f}s")
+        await store.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT))
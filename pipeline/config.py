@@ -1,14 +1,33 @@
 import asyncio
+import os
 import sys
 from enum import Enum
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from loguru import logger
 
+import metrics
+
 
 class StoreType(str, Enum):
     """Supported pipeline data store types."""
 
     MEMORY = "MEMORY"
+    SQLITE = "SQLITE"
+
+
+class SchedulerBackend(str, Enum):
+    """Supported dispatchers for scheduled pipeline runs."""
+
+    APSCHEDULER = "APSCHEDULER"  # One APScheduler DateTrigger job per pipeline
+    HEAP = "HEAP"  # A single min-heap driven by one asyncio timer task
+
+
+class RunExecutorType(str, Enum):
+    """Where pipeline runs execute."""
+
+    INLINE = "INLINE"  # On the API event loop
+    PROCESS = "PROCESS"  # In a pool of worker processes
 
 
 class AppSettings(BaseSettings):
@@ -28,14 +47,71 @@ class AppSettings(BaseSettings):
 
     # Store configuration
     STORE_TYPE: StoreType = StoreType.MEMORY
+    SQLITE_PATH: str = "data/pipelines.db"  # Database file for the SQLITE store
+    SQLITE_POOL_SIZE: int = 4  # Pooled connections used off the event loop
+    RESULTS_DIR: str = "data/results"  # Directory for run outputs (one file per run) of the SQLITE store
+    BLOB_DIR: str = "data/blobs"  # Uploaded files, stored by content hash
+    BLOB_GC_INTERVAL_SEC: float | None = 3600  # Seconds between removals of uploads no pipeline uses; unset to keep all
+    BLOB_GC_MIN_AGE_SEC: float = 86400  # Uploads used more recently are kept, e.g. for a pipeline yet to be created
 
     # Scheduler configuration
-    SCHEDULER_CHECK_INTERVAL: int = 60  # Seconds between pipeline discovery checks
+    SCHEDULER_BACKEND: SchedulerBackend = SchedulerBackend.APSCHEDULER
+    SCHEDULER_CHECK_INTERVAL: int = 600  # Seconds between reconciliation sweeps (safety net; edits arrive via the change feed)
     SCHEDULER_MAX_CONCURRENT_RUNS: int = 5  # Max concurrent pipeline runs via scheduler
     SCHEDULER_MISFIRE_GRACE_SEC: int = 300  # Grace time for missed jobs (seconds)
+    SCHEDULER_LOOKAHEAD_SEC: int = 1800  # Only pipelines due within this window get a job
+    SCHEDULER_CATCHUP_RATE: float = 0.5  # Missed runs released per second after downtime
+    SCHEDULER_STATE_PATH: str | None = None  # Local scheduler state (e.g. data/scheduler.db), kept across restarts; needs STORE_TYPE=SQLITE, as MEMORY pipelines are gone after one
+    SCHEDULER_STATE_FLUSH_SEC: float = 1.0  # Seconds between batched state writes
+    SCHEDULER_SHARDING_ENABLED: bool = False  # Split pipelines across scheduler nodes
+    SCHEDULER_NODE_ID: str | None = None  # Defaults to hostname-pid
+    SCHEDULER_SHARD_COUNT: int = 256  # Fixed; must match on every node
+    SCHEDULER_LEASE_PATH: str = "data/leases.db"  # Shard leases, shared by all nodes
+    SCHEDULER_LEASE_TTL_SEC: float = 15.0  # A dead node's shards move after this
+    SCHEDULER_LEASE_RENEW_SEC: float = 5.0  # Seconds between lease renewals
+
+    # Run execution
+    RUN_TIMEOUT_SEC: float | None = 3600  # Default run deadline; unset for none
+    RUN_CANCEL_GRACE_SEC: float = 10.0  # Time a cancelled run gets to clean up
+    # Default retry policy of failed runs (see models.pipeline.RetryPolicy)
+    RUN_RETRY_MAX_ATTEMPTS: int = 0  # Retries after a failed attempt; 0 disables
+    RUN_RETRY_BASE_DELAY_SEC: float = 60.0
+    RUN_RETRY_MAX_DELAY_SEC: float = 3600.0
+    RUN_RETRY_JITTER: float = 0.1
+    RUN_EXECUTOR: RunExecutorType = RunExecutorType.INLINE
+    RUN_EXECUTOR_WORKERS: int = 2  # Worker processes for the PROCESS executor
+    RUN_EXECUTOR_MAX_TASKS_PER_CHILD: int | None = None  # Recycle workers after N runs
+
+    # Schedule spreading (opt-in): run each pipeline at a stable offset after
+    # its base slot (00:00 UTC) instead of all at once
+    SCHEDULE_SPREAD_ENABLED: bool = False
+    SCHEDULE_SPREAD_WINDOW_SEC: int = 3600  # Offsets fall within [0, window)
+    SCHEDULE_SPREAD_BALANCE: bool = False  # Pick the least loaded of a few hashed offsets
+    SCHEDULE_SPREAD_CHOICES: int = 4  # Candidate offsets considered when balancing
+    SCHEDULE_SPREAD_BUCKET_SEC: int = 60  # Load is compared per bucket of this size
 
     # Ingestion Defaults
     DEFAULT_API_TIMEOUT: int = 30
+    INGEST_MAX_CONCURRENT_SOURCES: int = 8  # Sources of one run fetched at once
+    API_PREFETCH_PAGES: int = 1  # Pages of a paginated source fetched ahead
+    FILE_CHUNK_ROWS: int = 50_000  # Rows of an uploaded file converted at a time
+    FILE_PARSE_WORKERS: int = 0  # Processes parsing large stored CSV uploads; < 2 disables
+    FILE_PARSE_RANGE_BYTES: int = 16 * 1024 * 1024  # Bytes of a CSV parsed per task
+    # Shared HTTP client of the API adapters (ingestion/http_client.py)
+    HTTP_MAX_CONNECTIONS: int = 100  # Pooled connections, all hosts
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 10  # Concurrent requests to one host
+    HTTP_KEEPALIVE_EXPIRY_SEC: float = 30.0
+    HTTP2_ENABLED: bool = True
+    HTTP_RETRIES: int = 3  # Retries of 5xx responses and transport errors
+    HTTP_RETRY_BACKOFF_SEC: float = 0.3  # Backoff factor: 0.3s, 0.6s, 1.2s
+    HTTP_CACHE_DIR: str | None = None  # Conditional-request cache of API responses; unset to disable
+    # Warm browsers shared by scrape sources (ingestion/browser_pool.py)
+    SCRAPER_BROWSERS: int = 1  # Browsers kept started
+    SCRAPER_MAX_PAGES: int = 8  # Pages open at once, all browsers
+    SCRAPER_BROWSER_RECYCLE_PAGES: int = 500  # Replace a browser after N pages; 0 never
+    SCRAPER_BROWSER_MAX_RSS_MB: float | None = None  # Replace browsers above this memory use; needs psutil
+    SCRAPER_BLOCK_RESOURCES: bool = False  # Do not download images, fonts and media
+    SCRAPER_BROWSER_PREWARM: bool = False  # Start the browsers with the API, not on the first scrape
     DEFAULT_SCRAPER_LLM_PROVIDER: str = "gemini/gemini-1.5-pro"
     DEFAULT_SCRAPER_CACHE_MODE: str = "ENABLED"
     DEFAULT_SCRAPER_PROMPT: str = (
@@ -45,6 +121,22 @@ class AppSettings(BaseSettings):
     # SSE Configuration
     SSE_LOG_QUEUE_MAX_SIZE: int = 1000  # Max size for the SSE log queue
 
+    @model_validator(mode="after")
+    def _check_stores(self) -> "AppSettings":
+        # every node must see the same pipelines, and their runs' status
+        if self.SCHEDULER_SHARDING_ENABLED and self.STORE_TYPE == StoreType.MEMORY:
+            raise ValueError(
+                "SCHEDULER_SHARDING_ENABLED needs a store shared by all nodes "
+                "(STORE_TYPE=SQLITE), not STORE_TYPE=MEMORY"
+            )
+        # the state refers to pipelines, which must still be there on restart
+        if self.SCHEDULER_STATE_PATH and self.STORE_TYPE == StoreType.MEMORY:
+            raise ValueError(
+                "SCHEDULER_STATE_PATH needs a persistent store (STORE_TYPE=SQLITE), "
+                "not STORE_TYPE=MEMORY"
+            )
+        return self
+
     # Pydantic settings configuration
     model_config = SettingsConfigDict(
         env_file=".env",  # Load .env file if it exists
@@ -56,30 +148,33 @@ class AppSettings(BaseSettings):
 settings = AppSettings()
 
 # --- Basic Loguru Configuration ---
-logger.remove()
-logger.add(
-    sys.stderr,
-    level=settings.LOG_LEVEL.upper(),
-    # format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
-    colorize=True,
-)
-
-# File Sink
-logger.add(
-    "logs/app_{time}.log",
-    level=settings.LOG_LEVEL.upper(),
-    rotation="10 MB",  # Rotate log file when it reaches 10 MB
-    retention="7 days",  # Keep logs for 7 days
-    compression="zip",  # Compress rotated files
-    format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
-)
-
-logger.info("Logger configured with level: {}", settings.LOG_LEVEL)
-logger.info(
-    "Application settings loaded. Store type: {}, SSE Logging: {}",
-    settings.STORE_TYPE,
-    "Enabled" if settings.LOG_ENABLE_SSE else "Disabled",
-)
+# Run worker processes (services/run_worker.py) forward their logs to the
+# parent's sinks and must not configure their own
+if not os.environ.get("PIPELINE_RUN_WORKER"):
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level=settings.LOG_LEVEL.upper(),
+        # format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
+        colorize=True,
+    )
+
+    # File Sink
+    logger.add(
+        "logs/app_{time}.log",
+        level=settings.LOG_LEVEL.upper(),
+        rotation="10 MB",  # Rotate log file when it reaches 10 MB
+        retention="7 days",  # Keep logs for 7 days
+        compression="zip",  # Compress rotated files
+        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
+    )
+
+    logger.info("Logger configured with level: {}", settings.LOG_LEVEL)
+    logger.info(
+        "Application settings loaded. Store type: {}, SSE Logging: {}",
+        settings.STORE_TYPE,
+        "Enabled" if settings.LOG_ENABLE_SSE else "Disabled",
+    )
 
 # --------- SSE Log Queue ---------
 
@@ -112,6 +207,7 @@ def sse_log_sink(message):
             log_entry = f"{record['time']:YYYY-MM-DD HH:mm:ss.SSS} | {record['level']: <8} | {record['name']}:{record['function']}:{record['line']} - {record['message']}"
             sse_log_queue.put_nowait(log_entry)
         except asyncio.QueueFull:
+            metrics.SSE_LOG_DROPPED.inc()
             print("Warning: SSE log queue is full. Dropping message.", file=sys.stderr)
         except Exception as e:
             print(f"Error in SSE log sink: {e}", file=sys.stderr)
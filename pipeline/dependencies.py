@@ -12,6 +12,16 @@ async def get_pipeline_service(request: Request):
     return service
 
 
+async def get_scheduler_manager(request: Request):
+    scheduler_manager = getattr(request.app.state, "scheduler_manager", None)
+    if not scheduler_manager:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Scheduler not available.",
+        )
+    return scheduler_manager
+
+
 async def get_sse_log_queue(request: Request) -> asyncio.Queue | None:
     """Dependency to get the SSE log queue from app state."""
     queue = getattr(request.app.state, "sse_log_queue", None)
@@ -22,3 +32,13 @@ async def get_sse_log_queue(request: Request) -> asyncio.Queue | None:
             detail="Log streaming service queue not available.",
         )
     return queue
+
+
+async def get_blob_store(request: Request):
+    blobs = getattr(request.app.state, "blob_store", None)
+    if blobs is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Upload storage not available.",
+        )
+    return blobs
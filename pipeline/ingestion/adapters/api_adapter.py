@@ -2,17 +2,30 @@
 API adapter to fetch JSON data from HTTP endpoints.
 """
 
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+import httpx
 
 from config import settings
 
-from models.ingestion import AdapterRecord
+from ingestion.errors import PermanentSourceError, TransientSourceError
+from ingestion.http_cache import CacheEntry, HttpCache, shared_cache
+from ingestion.http_client import HttpClient, shared_client
+from ingestion.json_stream import JsonArrayStream, JsonStreamError
+from models.ingestion import AdapterRecord, PaginationConfig, StreamConfig
 
 from .base import DataSourceAdapter
+from .pagination import PageRequest, PageWalker, lookup
 from loguru import logger
 
+# Client errors worth fetching again
+RETRYABLE_STATUS = {408, 429}
+
+# Hands a batch of records to the consumer; False once no more are wanted
+Emit = Callable[[list[AdapterRecord]], Awaitable[bool]]
+
 
 class ApiAdapter(DataSourceAdapter):
     """
@@ -25,6 +38,12 @@ class ApiAdapter(DataSourceAdapter):
         headers: dict[str, str] | None = None,
         timeout: float = settings.DEFAULT_API_TIMEOUT,
         token: str | None = None,
+        deadline: float | None = None,
+        client: HttpClient | None = None,
+        pagination: PaginationConfig | None = None,
+        prefetch: int = settings.API_PREFETCH_PAGES,
+        cache: HttpCache | None = None,
+        stream: StreamConfig | None = None,
     ):
         """
         Initialize the API adapter.
@@ -34,65 +53,269 @@ class ApiAdapter(DataSourceAdapter):
             headers: Optional HTTP headers.
             timeout: Timeout in seconds for the request.
             token: Optional bearer token for Authorization header.
+            deadline: Run deadline (time.time()); the request timeout is capped to it.
+            client: HTTP client to use; defaults to the one shared by all adapters.
+            pagination: How to walk the pages of a paginated endpoint.
+            prefetch: Pages fetched ahead of the one being handled.
+            cache: Conditional-request cache; defaults to the shared one, if enabled.
+            stream: Decode the response incrementally, in batches of records.
         """
         self.url = url
         self.headers = headers or {}
         if token:
             self.headers["Authorization"] = f"Bearer {token}"
         self.timeout = timeout
+        self.deadline = deadline
+        self.client = client or shared_client()
+        self.pagination = pagination
+        self.cache = cache or shared_cache()
+        self.stream = stream
+        self.items_path = pagination.items_path if pagination else None
+        if stream is not None and stream.items_path:
+            self.items_path = stream.items_path
+        self.prefetch = max(1, prefetch)
         logger.info(
             f"Initializing ApiAdapter for URL: {url} with timeout: {self.timeout}s"
         )
-        self.session = self._init_session()
-
-    def _init_session(self) -> requests.Session:
-        """
-        Initialize a requests.Session with retry logic.
-        """
-        session = requests.Session()
-        retries = Retry(
-            total=3,
-            backoff_factor=0.3,
-            status_forcelist=[500, 502, 503, 504],
-            allowed_methods=["GET"],
-        )
-        adapter = HTTPAdapter(max_retries=retries)
-        session.mount("https://", adapter)
-        session.mount("http://", adapter)
-        logger.debug("HTTP session initialized with retry strategy.")
-        return session
 
     async def fetch(self) -> list[AdapterRecord]:
         """
-        Perform a GET request and return JSON data as a list of records.
+        Perform a GET request and return JSON data as a list of records; with
+        pagination, the records of all pages up to the page and record caps.
 
         Returns:
             List of dicts from the JSON response.
 
         Raises:
-            RuntimeError: On network error, HTTP error, or JSON parse error.
+            TransientSourceError: On network error, or a 408, 429 or 5xx response.
+            PermanentSourceError: On other HTTP errors, or a JSON parse error.
         """
-        logger.info(f"Fetching data from API: {self.url}")
+        records: list[AdapterRecord] = []
+        async for page in self.pages():
+            records.extend(page)
+        return records
+
+    async def pages(self) -> AsyncIterator[list[AdapterRecord]]:
+        """
+        Yield the records of each page, or of each batch when streaming. The
+        next page (batch) is fetched while the caller handles the current
+        one; at most `prefetch` wait in the queue, so memory stays bounded to
+        a few pages (batches).
+
+        Raises:
+            Same as fetch().
+        """
+        if self.pagination is None and self.stream is None:
+            records: list[AdapterRecord] = []
+
+            async def collect(batch: list[AdapterRecord]) -> bool:
+                records.extend(batch)
+                return True
+
+            await self._page((self.url, {}), None, collect)
+            yield records
+            return
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.prefetch)
+        producer = asyncio.create_task(self._produce(queue))
+        try:
+            while (page := await queue.get()) is not None:
+                if isinstance(page, Exception):
+                    raise page
+                yield page
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    async def _produce(self, queue: asyncio.Queue) -> None:
+        """Fetch pages into the queue, then None; or the error that stopped it."""
+        config = self.pagination
+        walker: Optional[PageWalker] = None
+        request: Optional[PageRequest] = (self.url, {})
+        if config is not None:
+            walker = PageWalker(self.url, config)
+            request = walker.first()
+        max_records = config.max_records if config else None
+        pages = records = 0
+
+        async def emit(batch: list[AdapterRecord]) -> bool:
+            nonlocal records
+            if max_records is not None:
+                batch = batch[: max_records - records]
+            records += len(batch)
+            await queue.put(batch)
+            return max_records is None or records < max_records
+
         try:
-            response = self.session.get(
-                self.url, headers=self.headers, timeout=self.timeout
+            while request is not None:
+                before = records
+                request = await self._page(request, walker, emit)
+                pages += 1
+                logger.debug(
+                    f"Fetched page {pages} of {self.url} with {records - before} records"
+                )
+                if max_records is not None and records >= max_records:
+                    request = None
+                if config and config.max_pages and pages >= config.max_pages:
+                    request = None
+            await queue.put(None)
+        except Exception as e:
+            await queue.put(e)
+
+    async def _page(
+        self, request: PageRequest, walker: Optional[PageWalker], emit: Emit
+    ) -> Optional[PageRequest]:
+        """
+        Fetch one page, emit its records and return the request of the next
+        page. With a cache, the request is conditional and a 304 reuses the
+        cached records without decoding anything.
+        """
+        url, params = request
+        headers = self.headers
+        key: Optional[str] = None
+        entry: Optional[CacheEntry] = None
+        if self.cache is not None and self.stream is None:
+            key = self.cache.key(url, params, self.headers)
+            entry = await self.cache.get(key)
+            if entry is not None:
+                headers = {**self.headers, **entry.conditional_headers()}
+
+        async with self._request(url, params, headers) as response:
+            if self.stream is not None:
+                return await self._stream_page(request, walker, response, emit)
+            await response.aread()
+
+        if entry is not None and response.status_code == 304:
+            self.cache.record(hit=True)
+            logger.info(
+                f"Not modified: {url}, reusing {len(entry.records)} cached records"
             )
-            response.raise_for_status()
-            logger.debug(f"Received response with status code: {response.status_code}")
-        except requests.exceptions.RequestException as e:
+            records = [AdapterRecord(source=self.url, data=d) for d in entry.records]
+            await emit(records)
+            return entry.next
+
+        body = self._json(response)
+        items = body
+        if self.items_path is not None:
+            items = lookup(body, self.items_path)
+            if items is None:
+                items = []
+        records = self._records(items)
+        next_request = None
+        if walker is not None:
+            next_request = walker.next(request, response, body, len(records))
+        if self.cache is not None:
+            self.cache.record(hit=False)
+            await self._remember(key, response, records, next_request)
+        # drop the decoded page before waiting for room in the queue
+        del body, items
+        await emit(records)
+        return next_request
+
+    async def _stream_page(
+        self,
+        request: PageRequest,
+        walker: Optional[PageWalker],
+        response: httpx.Response,
+        emit: Emit,
+    ) -> Optional[PageRequest]:
+        """
+        Decode the items of a page while it downloads and emit them in
+        batches of stream.batch_size records.
+        """
+        size = self.stream.batch_size
+        stream = JsonArrayStream(response.aiter_bytes(), self.items_path)
+        batch: list[AdapterRecord] = []
+        count = 0
+        try:
+            async for items in stream.batches():
+                batch.extend(AdapterRecord(source=self.url, data=i) for i in items)
+                while len(batch) >= size:
+                    count += size
+                    if not await emit(batch[:size]):
+                        return None
+                    del batch[:size]
+        except JsonStreamError as e:
+            logger.error(f"Failed to parse JSON response: {e}")
+            raise PermanentSourceError(f"Failed to parse JSON response: {e}")
+        if batch:
+            count += len(batch)
+            if not await emit(batch):
+                return None
+        logger.debug(f"Streamed {count} records from {response.url}")
+        if walker is None:
+            return None
+        return walker.next(request, response, stream.body, count)
+
+    async def _remember(
+        self,
+        key: str,
+        response: httpx.Response,
+        records: list[AdapterRecord],
+        next_request: Optional[PageRequest],
+    ) -> None:
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            # nothing to revalidate with: drop what an earlier response left
+            await self.cache.discard(key)
+            return
+        entry = CacheEntry(
+            url=str(response.url),
+            etag=etag,
+            last_modified=last_modified,
+            records=[record.data for record in records],
+            next=next_request,
+        )
+        await self.cache.put(key, entry)
+
+    @asynccontextmanager
+    async def _request(
+        self, url: str, params: dict[str, Any], headers: dict[str, str]
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        The response of a GET, with its body left to read inside the block.
+        HTTP errors, including those while reading the body, are raised as
+        source errors.
+        """
+        logger.info(f"Fetching data from API: {url} {params or ''}")
+        try:
+            async with self.client.stream(
+                url,
+                headers=headers,
+                params=params,
+                timeout=self.timeout,
+                deadline=self.deadline,
+            ) as response:
+                if response.status_code != httpx.codes.NOT_MODIFIED:
+                    response.raise_for_status()
+                logger.debug(
+                    f"Received response with status code: {response.status_code}"
+                )
+                yield response
+        except httpx.HTTPStatusError as e:
             logger.error(f"API request failed: {e}")
-            raise RuntimeError(f"API request failed: {e}")
+            status = e.response.status_code
+            if status < 500 and status not in RETRYABLE_STATUS:
+                raise PermanentSourceError(f"API request failed: {e}")
+            raise TransientSourceError(f"API request failed: {e}")
+        except httpx.HTTPError as e:
+            logger.error(f"API request failed: {e!r}")
+            raise TransientSourceError(f"API request failed: {e!r}")
 
+    def _json(self, response: httpx.Response) -> Any:
         try:
             data = response.json()
-            logger.debug(f"Successfully parsed JSON response from {self.url}")
+            logger.debug(f"Successfully parsed JSON response from {response.url}")
         except ValueError as e:
             logger.error(f"Failed to parse JSON response: {e}")
-            raise RuntimeError(f"Failed to parse JSON response: {e}")
+            raise PermanentSourceError(f"Failed to parse JSON response: {e}")
+        return data
 
+    def _records(self, data: Any) -> list[AdapterRecord]:
         if isinstance(data, list):
             return [AdapterRecord(source=self.url, data=item) for item in data]
         if isinstance(data, dict):
             return [AdapterRecord(source=self.url, data=data)]
         logger.error("Unexpected JSON structure: expected list or dict.")
-        raise RuntimeError("Unexpected JSON structure: expected list or dict.")
+        raise PermanentSourceError("Unexpected JSON structure: expected list or dict.")
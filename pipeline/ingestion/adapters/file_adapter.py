@@ -1,33 +1,132 @@
 """
-File adapter to load data from CSV or JSON files.
+File adapter to load data from CSV, JSON, NDJSON or Parquet files.
 """
 
+import asyncio
+import codecs
+from typing import Any, AsyncIterator, BinaryIO, Iterator
+
 import pandas as pd
 from loguru import logger
 from fastapi import UploadFile
 
+from config import settings
+from services import csv_worker
+from stores.blobs import BlobStore, shared_blob_store
+
 from .base import DataSourceAdapter
+from ingestion.deadlines import check
+from ingestion.parallel_csv import CsvParsePool, shared_parse_pool
 from models.ingestion import AdapterRecord
 
+try:
+    import pyarrow.parquet as pa_parquet
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# file extension -> format
+FILE_FORMATS = {
+    "csv": "csv",
+    "json": "json",
+    "ndjson": "ndjson",
+    "jsonl": "ndjson",
+    "parquet": "parquet",
+}
+
+Rows = list[dict[str, Any]]
+
+# Version of the rows parsed from a file, part of the parse cache key so
+# rows cached by an older parser are never read. Bump it whenever the rows
+# parsed from the same file, or the way they are cached, change.
+PARSE_VERSION = 3
+
+
+def cache_key(file_format: str) -> str:
+    """The parse cache key of the rows of a file in file_format."""
+    # pandas and pyarrow do not read every CSV value alike
+    reader = "" if PYARROW_AVAILABLE else "-pandas"
+    return f"{file_format}-v{PARSE_VERSION}{reader}"
+
+
+def cache_keys() -> set[str]:
+    """The parse cache keys in use; caches under any other key are stale."""
+    return {cache_key(file_format) for file_format in FILE_FORMATS.values()}
+
+
+def rechunk(chunks: Iterator[Rows], size: int) -> Iterator[Rows]:
+    """The rows of chunks, size at a time."""
+    pending: Rows = []
+    for rows in chunks:
+        if not pending and len(rows) == size:
+            yield rows
+            continue
+        pending += rows
+        while len(pending) >= size:
+            yield pending[:size]
+            del pending[:size]
+    if pending:
+        yield pending
+
+
+def frame_rows(df: pd.DataFrame) -> Rows:
+    """The rows of a DataFrame as dicts of Python values, missing values as None."""
+    df = df.astype(object).where(df.notna(), None)
+    df.columns = df.columns.map(str)
+    return df.to_dict("records")
+
 
 class FileAdapter(DataSourceAdapter):
     """
-    Adapter for reading data from local files (CSV or JSON), or from uploaded file-like objects.
+    Adapter for reading data from local files (CSV, JSON, NDJSON or Parquet), or from uploaded file-like objects.
+
+    Files are read and converted to records in chunks of chunk_rows rows, on
+    a worker thread. Integer columns stay integers, also with missing values
+    (which become None). CSV files are read with pyarrow when it is
+    installed, and with pandas otherwise; Parquet files need pyarrow.
+
+    A stored upload (see stores.blobs) is read through a memory map, and the
+    rows parsed from it are cached with it: reading it again yields the
+    cached rows, in chunks of chunk_rows, without parsing. A stored CSV
+    upload larger than a range of the parse pool is parsed by the pool's
+    worker processes when there is one (see ingestion.parallel_csv).
     """
 
     def __init__(
         self,
-        upload: UploadFile,
+        upload: UploadFile | None = None,
+        deadline: float | None = None,
+        chunk_rows: int = settings.FILE_CHUNK_ROWS,
+        blob_id: str | None = None,
+        filename: str | None = None,
+        blobs: BlobStore | None = None,
+        parse_pool: CsvParsePool | None = None,
     ):
         """
         Initialize the file adapter.
 
         Args:
             upload: File uploaded from user.
+            deadline: Run deadline (time.time()); parsing stops once it passes.
+            chunk_rows: Rows read and converted to records at a time.
+            blob_id: Id of a stored upload, read instead of upload.
+            filename: File name of the stored upload.
+            blobs: Store of the upload; shared_blob_store() when not given.
+            parse_pool: Pool parsing large stored CSV uploads; shared_parse_pool()
+                when not given.
         """
+        if (upload is None) == (blob_id is None):
+            raise ValueError("Exactly one of upload and blob_id is required")
         self.upload = upload
+        self.blob_id = blob_id
+        self.filename = upload.filename if upload is not None else filename
+        self.blobs = blobs
+        self.parse_pool = parse_pool
+        self.deadline = deadline
+        self.chunk_rows = max(1, chunk_rows)
         logger.info(
-            f"Initialized FileAdapter for upload: {upload.filename}, format: {upload.content_type}"
+            f"Initialized FileAdapter for {'upload' if upload else f'blob {blob_id}'}: {self.filename}"
         )
 
     async def fetch(self) -> list[AdapterRecord]:
@@ -39,22 +138,105 @@ class FileAdapter(DataSourceAdapter):
             List of AdapterRecord objects.
         """
         records: list[AdapterRecord] = []
+        async for batch in self.batches():
+            records.extend(batch)
+        return records
 
-        if not self.upload.filename:
+    async def batches(self) -> AsyncIterator[list[AdapterRecord]]:
+        """
+        Yield the records of the file a chunk at a time.
+
+        Raises:
+            ValueError: Without a file name, or for an unsupported file type.
+            TimeoutError: Once the run deadline has passed.
+        """
+        if not self.filename:
             raise ValueError("File name is required")
 
-        filetype = self.upload.filename.split(".")[-1].lower()
+        filetype = self.filename.split(".")[-1].lower()
+        file_format = FILE_FORMATS.get(filetype)
+        if file_format is None:
+            raise ValueError(f"Unsupported file type: {filetype}")
+        if file_format == "parquet" and not PYARROW_AVAILABLE:
+            raise ValueError("Parquet files need the pyarrow package")
 
-        if filetype == "csv":
-            df = pd.read_csv(self.upload.file)
-        elif filetype == "json":
-            df = pd.read_json(self.upload.file)
+        source = self.filename
+        if self.upload is not None:
+            chunks = self._chunks(self.upload.file, file_format)
         else:
-            raise ValueError(f"Unsupported file type: {filetype}")
+            blobs = self.blobs or shared_blob_store()
+            if blobs.size(self.blob_id) is None:
+                raise ValueError(f"Stored upload not found: {self.blob_id}")
+            chunks = self._blob_chunks(blobs, file_format)
+        try:
+            while True:
+                check(self.deadline)
+                rows = await asyncio.to_thread(next, chunks, None)
+                if rows is None:
+                    return
+                # rows are dicts with str keys by construction: skip validation
+                yield [
+                    AdapterRecord.model_construct(source=source, data=r) for r in rows
+                ]
+        finally:
+            # releases the file and drops a partial parse cache; a chunk still
+            # being read by the thread of a cancelled run leaves that to the GC
+            if not chunks.gi_running:
+                chunks.close()
 
-        for _, row in df.iterrows():
-            record_data = row.to_dict()
-            record = AdapterRecord(source=self.upload.filename, data=record_data)
-            records.append(record)
+    def _blob_chunks(self, blobs: BlobStore, file_format: str) -> Iterator[Rows]:
+        """The rows of a stored upload, from the parse cache if there. Blocking."""
+        key = cache_key(file_format)
+        cached = blobs.cached_rows(self.blob_id, key)
+        if cached is not None:
+            logger.info(f"Reusing the parsed rows of blob {self.blob_id}")
+            # cached as chunked by the reader that parsed them
+            yield from rechunk(cached, self.chunk_rows)
+            return
+        pool = self.parse_pool or shared_parse_pool()
+        if (
+            file_format == "csv"
+            and PYARROW_AVAILABLE
+            and pool is not None
+            and blobs.size(self.blob_id) > pool.range_bytes
+        ):
+            path = str(blobs.path(self.blob_id))
+            chunks = pool.chunks(path, self.chunk_rows)
+            yield from blobs.cache_rows(self.blob_id, key, chunks)
+            return
+        with blobs.open(self.blob_id) as file:
+            yield from blobs.cache_rows(
+                self.blob_id, key, self._chunks(file, file_format)
+            )
 
-        return records
+    def _chunks(self, file: BinaryIO, file_format: str) -> Iterator[Rows]:
+        """The rows of the file, chunk_rows at a time. Blocking."""
+        size = self.chunk_rows
+        match file_format:
+            case "csv" if PYARROW_AVAILABLE:
+                table = csv_worker.read_table(file)
+                for batch in table.to_batches(max_chunksize=size):
+                    yield batch.to_pylist()
+            case "csv":
+                reader = pd.read_csv(
+                    file, chunksize=size, dtype_backend="numpy_nullable"
+                )
+                with reader:
+                    for df in reader:
+                        yield frame_rows(df)
+            case "json":
+                # a JSON document is parsed whole; only the conversion is chunked
+                df = pd.read_json(file).convert_dtypes()
+                for start in range(0, len(df), size):
+                    yield frame_rows(df.iloc[start : start + size])
+            case "ndjson":
+                # read as text: pandas cannot tell a memory map is binary
+                text = codecs.getreader("utf-8")(file)
+                with pd.read_json(text, lines=True, chunksize=size) as reader:
+                    for df in reader:
+                        yield frame_rows(df.convert_dtypes())
+            case "parquet":
+                # closed before the file, which may be a memory map it reads from
+                with pa_parquet.ParquetFile(file) as parquet:
+                    for batch in parquet.iter_batches(batch_size=size):
+                        yield batch.to_pylist()
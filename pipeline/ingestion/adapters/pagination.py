@@ -0,0 +1,83 @@
+"""
+Page walking for paginated API sources: which request fetches the first page,
+and which one (if any) fetches the page after a given response.
+"""
+
+from typing import Any, Optional
+
+import httpx
+
+from models.ingestion import PaginationConfig, PaginationMode
+
+# (url, query params) of a page request
+PageRequest = tuple[str, dict[str, Any]]
+
+
+def lookup(data: Any, path: str) -> Any:
+    """Value at a dotted path ("data.items") of a JSON body, or None."""
+    for key in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+class PageWalker:
+    """
+    Produces the request of each page of a paginated endpoint from the
+    pagination config, the previous request and its response. The position
+    (offset, page) travels in the request, so the walker keeps no state and
+    a cached next request can be followed as it is.
+    """
+
+    def __init__(self, url: str, config: PaginationConfig):
+        self.url = url
+        self.config = config
+
+    def _params(self, offset: int, page: int) -> dict[str, Any]:
+        config = self.config
+        params: dict[str, Any] = {}
+        if config.page_size is not None:
+            params[config.limit_param] = config.page_size
+        match config.mode:
+            case PaginationMode.OFFSET:
+                params[config.offset_param] = offset
+            case PaginationMode.PAGE:
+                params[config.page_param] = page
+        return params
+
+    def first(self) -> PageRequest:
+        if self.config.mode is PaginationMode.LINK:
+            return self.url, {}
+        return self.url, self._params(0, self.config.start_page)
+
+    def next(
+        self,
+        request: PageRequest,
+        response: httpx.Response,
+        body: Any,
+        item_count: int,
+    ) -> Optional[PageRequest]:
+        """The request of the page after this one, None after the last page."""
+        config = self.config
+        params = request[1]
+        match config.mode:
+            case PaginationMode.OFFSET | PaginationMode.PAGE:
+                if item_count == 0:
+                    return None
+                if config.page_size is not None and item_count < config.page_size:
+                    return None
+                offset = params.get(config.offset_param, 0) + item_count
+                page = params.get(config.page_param, config.start_page) + 1
+                return self.url, self._params(offset, page)
+            case PaginationMode.CURSOR:
+                cursor = lookup(body, config.cursor_path)
+                if not cursor or item_count == 0:
+                    return None
+                return self.url, {**self._params(0, 0), config.cursor_param: cursor}
+            case PaginationMode.LINK:
+                link = response.links.get("next", {}).get("url")
+                if not link:
+                    return None
+                # the next link may be relative to the page it came with
+                return str(response.url.join(link)), {}
@@ -2,13 +2,12 @@
 Web scraper adapter using crawl4ai to extract structured data.
 """
 
+import asyncio
 import json
 
 from config import settings
 
 from crawl4ai import (
-    AsyncWebCrawler,
-    BrowserConfig,
     CrawlerRunConfig,
     CacheMode,
     LLMConfig,
@@ -22,6 +21,9 @@ from crawl4ai.extraction_strategy import (
 
 
 from .base import DataSourceAdapter
+from ingestion.browser_pool import BrowserPool, shared_browser_pool
+from ingestion.deadlines import time_left
+from ingestion.errors import PermanentSourceError
 from loguru import logger
 
 from models.ingestion import AdapterRecord
@@ -33,7 +35,8 @@ from models.crawler import HouseSchema
 
 class WebScraperAdapter(DataSourceAdapter):
     """
-    Adapter for web scraping using crawl4ai.
+    Adapter for web scraping using crawl4ai. Pages are loaded in the warm
+    browsers of a BrowserPool, all URLs at once up to the pool's page limit.
     """
 
     def __init__(
@@ -46,6 +49,8 @@ class WebScraperAdapter(DataSourceAdapter):
         output_format: str = "json",
         verbose: bool = True,
         cache_mode: str = "BYPASS",
+        deadline: float | None = None,
+        browser_pool: BrowserPool | None = None,
     ):
         """
         Initialize the scraper adapter.
@@ -59,6 +64,9 @@ class WebScraperAdapter(DataSourceAdapter):
             output_format: Desired format for the extracted data.
             verbose: Enable verbose logging.
             cache_mode: Crawl cache mode (e.g., 'ENABLED').
+            deadline: Run deadline (time.time()); page loads are capped to it.
+            browser_pool: Browsers to load pages in; shared_browser_pool() when
+                not given.
         """
         self.urls = urls
         self.schema_file = schema_file
@@ -68,6 +76,8 @@ class WebScraperAdapter(DataSourceAdapter):
         self.output_format = output_format
         self.verbose = verbose
         self.cache_mode = cache_mode
+        self.deadline = deadline
+        self.browser_pool = browser_pool
         logger.info(
             f"Initialized WebScraperAdapter for URLs: {urls} with schema_file={schema_file}, prompt={prompt}, llm_provider={llm_provider}, output_format={output_format}, verbose={verbose}, cache_mode={cache_mode}"
         )
@@ -95,11 +105,6 @@ class WebScraperAdapter(DataSourceAdapter):
         Internal async method to perform crawling and extraction.
         """
         logger.info("Starting async web scraping fetch.")
-        # Initialize crawler
-        browser_cfg = BrowserConfig(headless=True, verbose=self.verbose)
-        crawler = AsyncWebCrawler(config=browser_cfg)
-        await crawler.start()
-
         # Prepare extraction strategy
         llm_cfg = LLMConfig(provider=self.llm_provider, api_token=self.api_key)
         extraction_strategy: ExtractionStrategy | None = None
@@ -114,8 +119,7 @@ class WebScraperAdapter(DataSourceAdapter):
                 logger.debug(f"Loaded schema file: {self.schema_file}")
             except Exception as e:
                 logger.error(f"Failed to load schema file '{self.schema_file}': {e}")
-                await crawler.close()
-                raise RuntimeError(
+                raise PermanentSourceError(
                     f"Failed to load schema file '{self.schema_file}': {e}"
                 )
         elif self.prompt:
@@ -132,7 +136,6 @@ class WebScraperAdapter(DataSourceAdapter):
             logger.debug("Using LLM extraction strategy.")
         else:
             logger.error("Either 'schema_file' or 'prompt' must be provided.")
-            await crawler.close()
             raise ValueError("Either 'schema_file' or 'prompt' must be provided.")
 
         # Configure cache mode
@@ -150,15 +153,23 @@ class WebScraperAdapter(DataSourceAdapter):
             verbose=self.verbose,
         )
 
-        # Execute crawl
-        try:
-            logger.info(f"Crawling URLs: {self.urls}")
-            results: list[CrawlResult] = await crawler.arun_many(
-                urls=self.urls, config=run_cfg
-            )
-            logger.info("Crawling completed.")
-        finally:
-            await crawler.close()
+        if self.deadline is not None:
+            # no page load may outlive the run
+            run_cfg.page_timeout = int(time_left(self.deadline) * 1000)
+
+        pool = self.browser_pool or shared_browser_pool()
+
+        async def crawl(url: str) -> CrawlResult:
+            async with pool.page() as crawler:
+                return await crawler.arun(url=url, config=run_cfg)
+
+        # the pages of a failed, timed out or cancelled run are closed by
+        # crawl4ai; the browsers stay up for the next run
+        logger.info(f"Crawling URLs: {self.urls}")
+        results: list[CrawlResult] = await asyncio.gather(
+            *(crawl(url) for url in self.urls)
+        )
+        logger.info("Crawling completed.")
 
         adapter_records: list[AdapterRecord] = []
         for res in results:
@@ -0,0 +1,218 @@
+"""
+Warm headless browsers shared by the web scraper adapters of all runs, so a
+scrape pays for page loads only, not for starting Chromium.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, List, Optional
+
+from crawl4ai import AsyncWebCrawler, BrowserConfig
+from loguru import logger
+
+import metrics
+from config import settings
+
+try:
+    import psutil
+
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+# Seconds between checks of the memory used by the browsers
+RSS_CHECK_INTERVAL_SEC = 5.0
+
+_LAUNCHES = {
+    reason: metrics.SCRAPER_BROWSER_LAUNCHES.labels(reason)
+    for reason in ("start", "pages", "memory")
+}
+
+
+@dataclass(eq=False)
+class _Browser:
+    crawler: AsyncWebCrawler
+    pages: int = 0  # pages served
+    open: int = 0  # pages open now
+    retiring: bool = False
+
+
+def browser_rss_mb() -> float:
+    """Resident memory of the browser processes started by this process, in MiB."""
+    rss = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            name = child.name().lower()
+            if "chrom" in name or "headless_shell" in name:
+                rss += child.memory_info().rss
+        except psutil.Error:
+            continue  # exited meanwhile
+    return rss / 2**20
+
+
+class BrowserPool:
+    """
+    Keeps `size` started browsers (crawl4ai AsyncWebCrawler) and lends them
+    out a page at a time, to at most max_pages pages at once over all
+    browsers; each page goes to the browser with the fewest pages open.
+
+    A browser is replaced once it has served recycle_pages pages, or when the
+    browser processes of this service use more than max_rss_mb MiB (checked
+    with psutil, if installed). The replacement starts in the background
+    while the old browser serves on; the old one is closed once its last
+    page is done. With block_resources, images, fonts and media are never
+    downloaded (crawl4ai's text mode).
+
+    Browsers belong to the event loop they were started on. The pool starts
+    on its first page, or with the API's lifespan; a run worker process
+    closes it at the end of each run, as each run has a loop of its own.
+    """
+
+    def __init__(
+        self,
+        size: int = settings.SCRAPER_BROWSERS,
+        max_pages: int = settings.SCRAPER_MAX_PAGES,
+        recycle_pages: int = settings.SCRAPER_BROWSER_RECYCLE_PAGES,
+        max_rss_mb: Optional[float] = settings.SCRAPER_BROWSER_MAX_RSS_MB,
+        block_resources: bool = settings.SCRAPER_BLOCK_RESOURCES,
+        crawler_factory: Callable[..., AsyncWebCrawler] = AsyncWebCrawler,
+    ):
+        if max_rss_mb and not PSUTIL_AVAILABLE:
+            logger.warning("Browser memory limit set but psutil is missing.")
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.recycle_pages = recycle_pages
+        self.max_rss_mb = max_rss_mb if PSUTIL_AVAILABLE else None
+        self.block_resources = block_resources
+        self.crawler_factory = crawler_factory
+        self._browsers: List[_Browser] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._started: Optional[asyncio.Future] = None
+        self._pages: Optional[asyncio.Semaphore] = None
+        self._tasks: set[asyncio.Task] = set()
+        self._rss_checked_at = 0.0
+
+    def browser_config(self) -> BrowserConfig:
+        return BrowserConfig(
+            headless=True, verbose=False, text_mode=self.block_resources
+        )
+
+    async def _launch(self, reason: str) -> _Browser:
+        crawler = self.crawler_factory(config=self.browser_config())
+        await crawler.start()
+        _LAUNCHES[reason].inc()
+        return _Browser(crawler)
+
+    async def _launch_all(self) -> None:
+        try:
+            launches = (self._launch("start") for _ in range(self.size))
+            self._browsers = list(await asyncio.gather(*launches))
+        except BaseException:
+            self._loop = None  # the next page tries again
+            raise
+        logger.info(f"BrowserPool started {self.size} browsers.")
+
+    async def start(self) -> None:
+        """Start the browsers, if they are not running on this event loop yet."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # browsers of another, finished loop cannot be used (nor closed)
+            self._loop = loop
+            self._browsers = []
+            self._tasks = set()
+            self._pages = asyncio.Semaphore(self.max_pages)
+            self._started = asyncio.ensure_future(self._launch_all())
+        # a waiter cancelled (e.g. with its run) does not stop the launch
+        await asyncio.shield(self._started)
+
+    async def close(self) -> None:
+        """Close every browser. The pool starts again on its next page."""
+        if self._loop is not asyncio.get_running_loop():
+            return
+        for task in self._tasks:
+            task.cancel()
+        browsers, self._browsers = self._browsers, []
+        self._loop = None
+        await asyncio.gather(
+            *(b.crawler.close() for b in browsers), return_exceptions=True
+        )
+        logger.info("BrowserPool closed.")
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[AsyncWebCrawler]:
+        """A browser to load one page with, counted against max_pages."""
+        await self.start()
+        async with self._pages:
+            browser = min(self._browsers, key=lambda b: (b.retiring, b.open))
+            browser.open += 1
+            browser.pages += 1
+            try:
+                yield browser.crawler
+            finally:
+                browser.open -= 1
+                self._release(browser)
+
+    def _release(self, browser: _Browser) -> None:
+        if browser.retiring:
+            if browser.open == 0 and browser not in self._browsers:
+                self._spawn(browser.crawler.close())
+            return
+        if self.recycle_pages and browser.pages >= self.recycle_pages:
+            self._recycle(browser, "pages")
+        elif self.max_rss_mb and self._over_memory():
+            self._recycle(browser, "memory")
+
+    def _over_memory(self) -> bool:
+        now = time.monotonic()
+        if now - self._rss_checked_at < RSS_CHECK_INTERVAL_SEC:
+            return False
+        self._rss_checked_at = now
+        rss = browser_rss_mb()
+        if rss > self.max_rss_mb:
+            logger.info(f"Browsers use {rss:.0f} MiB, over {self.max_rss_mb} MiB")
+            return True
+        return False
+
+    def _recycle(self, browser: _Browser, reason: str) -> None:
+        logger.info(f"Replacing a browser after {browser.pages} pages ({reason})")
+        browser.retiring = True
+        self._spawn(self._replace(browser, reason))
+
+    async def _replace(self, old: _Browser, reason: str) -> None:
+        try:
+            new = await self._launch(reason)
+        except Exception as e:
+            logger.error(f"Could not start a replacement browser: {e}")
+            old.retiring = False
+            old.pages = 0  # serve on; try again after another recycle_pages
+            return
+        if old not in self._browsers:  # the pool was closed meanwhile
+            await new.crawler.close()
+            return
+        self._browsers[self._browsers.index(old)] = new
+        if old.open == 0:
+            await old.crawler.close()
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+_shared: Optional[BrowserPool] = None
+
+
+def shared_browser_pool() -> BrowserPool:
+    """The BrowserPool used by WebScraperAdapter unless one is passed in."""
+    global _shared
+    if _shared is None:
+        _shared = BrowserPool()
+    return _shared
+
+
+async def close_browser_pool() -> None:
+    """Close the shared BrowserPool's browsers, if it has any."""
+    if _shared is not None:
+        await _shared.close()
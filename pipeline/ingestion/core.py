@@ -13,11 +13,14 @@ class Ingestor:
     Args:
         sources (list[IngestSourceConfig]): List of sources to ingest.
         strategy (str, optional): Strategy to use for ingestion [simple, ml]. Defaults to "simple".
+        deadline (float, optional): Wall-clock time (time.time()) by which the run must finish; passed down to every adapter.
     """
 
     @staticmethod
     async def run(
-        sources: list[IngestSourceConfig], strategy: str = "simple"
+        sources: list[IngestSourceConfig],
+        strategy: str = "simple",
+        deadline: float | None = None,
     ) -> OutputData:
         strategies: dict[str, IngestionMethod] = {
             "simple": SimpleIngestionStrategy(),
@@ -27,4 +30,4 @@ class Ingestor:
         if strategy not in strategies:
             raise ValueError(f"Unsupported strategy: {strategy}")
 
-        return await strategies[strategy].run(sources)
+        return await strategies[strategy].run(sources, deadline=deadline)
@@ -0,0 +1,25 @@
+"""
+Run deadlines, as passed down to ingestion strategies and adapters: absolute
+wall-clock times (time.time()), or None for no deadline.
+"""
+
+import time
+
+
+def time_left(deadline: float | None, default: float | None = None) -> float | None:
+    """
+    Seconds until the deadline, capped at default (e.g. an adapter's own
+    timeout). Raises TimeoutError once the deadline has passed.
+    """
+    if deadline is None:
+        return default
+    left = deadline - time.time()
+    if left <= 0:
+        raise TimeoutError("Run deadline exceeded")
+    return left if default is None else min(left, default)
+
+
+def check(deadline: float | None) -> None:
+    """Raises TimeoutError if the deadline has passed."""
+    if deadline is not None and time.time() >= deadline:
+        raise TimeoutError("Run deadline exceeded")
@@ -0,0 +1,25 @@
+"""
+Errors raised by adapters, and their classification for the retry policy of a
+pipeline (see models.pipeline.RetryPolicy).
+"""
+
+from models.ingestion import ErrorClass
+
+
+class TransientSourceError(RuntimeError):
+    """The source may well succeed if fetched again (network error, 429, 5xx)."""
+
+
+class PermanentSourceError(RuntimeError):
+    """Fetching the source again fails the same way (4xx, unusable data)."""
+
+
+def classify(error: BaseException) -> ErrorClass:
+    """The error class of an exception raised while ingesting a source or run."""
+    if isinstance(error, TimeoutError):
+        return ErrorClass.TIMEOUT
+    if isinstance(error, TransientSourceError):
+        return ErrorClass.TRANSIENT
+    if isinstance(error, (PermanentSourceError, ValueError)):
+        return ErrorClass.PERMANENT
+    return ErrorClass.UNKNOWN
@@ -0,0 +1,144 @@
+"""
+On-disk cache of API responses for conditional requests. An entry keeps the
+validators of a response (ETag, Last-Modified) with the records parsed from
+it. The next fetch of the same request sends If-None-Match /
+If-Modified-Since and, on 304 Not Modified, reuses the cached records
+instead of downloading and decoding the body again.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from loguru import logger
+from pydantic import BaseModel, ValidationError
+
+import metrics
+from config import settings
+
+_REQUESTS = {
+    hit: metrics.HTTP_CACHE_REQUESTS.labels("hit" if hit else "miss")
+    for hit in (True, False)
+}
+
+
+class CacheEntry(BaseModel):
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    records: list[dict[str, Any]]
+    # the request of the next page, for paginated sources
+    next: Optional[tuple[str, dict[str, Any]]] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+
+_stats: ContextVar[Optional[CacheStats]] = ContextVar("http_cache_stats", default=None)
+
+
+@contextmanager
+def track_stats() -> Iterator[CacheStats]:
+    """Counts the cache hits and misses of the requests made inside the block."""
+    stats = CacheStats()
+    token = _stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _stats.reset(token)
+
+
+class HttpCache:
+    """
+    Cache entries are JSON files at <base_dir>/<key[:2]>/<key>.json, keyed by
+    a hash of the URL, query params and request headers (headers may carry
+    credentials, so only their hash is kept). Files are written atomically,
+    so run worker processes can share the directory. File work runs on
+    worker threads.
+    """
+
+    def __init__(self, base_dir: str):
+        logger.info(f"Initializing HttpCache at {base_dir}")
+        self.base_dir = Path(base_dir)
+
+    @staticmethod
+    def key(url: str, params: Dict[str, Any], headers: Dict[str, str]) -> str:
+        request = [
+            url,
+            sorted((str(k), str(v)) for k, v in params.items()),
+            sorted((k.lower(), v) for k, v in headers.items()),
+        ]
+        return hashlib.sha256(json.dumps(request).encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.base_dir / key[:2] / f"{key}.json"
+
+    def _read(self, key: str) -> Optional[CacheEntry]:
+        try:
+            return CacheEntry.model_validate_json(self._path(key).read_bytes())
+        except FileNotFoundError:
+            return None
+        except ValidationError as e:
+            logger.warning(f"Ignoring unreadable HTTP cache entry {key}: {e}")
+            return None
+
+    def _write(self, key: str, entry: CacheEntry) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(entry.model_dump_json().encode())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        return await asyncio.to_thread(self._read, key)
+
+    async def put(self, key: str, entry: CacheEntry) -> None:
+        await asyncio.to_thread(self._write, key, entry)
+
+    async def discard(self, key: str) -> None:
+        await asyncio.to_thread(self._path(key).unlink, missing_ok=True)
+
+    @staticmethod
+    def record(hit: bool) -> None:
+        """Counts a cacheable request in the metrics and the tracked stats."""
+        _REQUESTS[hit].inc()
+        stats = _stats.get()
+        if stats is not None:
+            if hit:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+
+
+_shared: Optional[HttpCache] = None
+
+
+def shared_cache() -> Optional[HttpCache]:
+    """The HttpCache used by adapters unless one is passed in; None if disabled."""
+    global _shared
+    if _shared is None and settings.HTTP_CACHE_DIR:
+        _shared = HttpCache(settings.HTTP_CACHE_DIR)
+    return _shared
@@ -0,0 +1,182 @@
+"""
+Async HTTP client shared by the API adapters of all runs: pooled keep-alive
+connections (HTTP/2 where the server offers it), a limit on concurrent
+requests per host, and retries of 5xx responses with exponential backoff.
+"""
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+from loguru import logger
+
+from config import settings
+from ingestion.deadlines import time_left
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+
+@dataclass
+class _LoopState:
+    """The connection pool and host limits of one event loop."""
+
+    client: httpx.AsyncClient
+    hosts: Dict[str, asyncio.Semaphore] = field(default_factory=dict)
+
+
+class HttpClient:
+    """
+    Pooled async HTTP client. Connections belong to an event loop, so one
+    httpx.AsyncClient is kept per loop (the API process has one; a run worker
+    process gets a new loop per run).
+
+    GET requests are retried up to `retries` times on a 5xx response or a
+    transport error, after backoff_factor * 2 ** n seconds, as the earlier
+    requests/urllib3 session did. Retries never wait past the run deadline.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = settings.HTTP_MAX_CONNECTIONS,
+        max_connections_per_host: int = settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+        keepalive_expiry: float = settings.HTTP_KEEPALIVE_EXPIRY_SEC,
+        http2: bool = settings.HTTP2_ENABLED,
+        retries: int = settings.HTTP_RETRIES,
+        backoff_factor: float = settings.HTTP_RETRY_BACKOFF_SEC,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but the h2 package is missing.")
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_connections_per_host = max_connections_per_host
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.transport = transport
+        self._loops: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, _LoopState
+        ] = weakref.WeakKeyDictionary()
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None or state.client.is_closed:
+            client = httpx.AsyncClient(
+                limits=self.limits,
+                http2=self.http2,
+                transport=self.transport,
+                follow_redirects=True,
+            )
+            state = self._loops[loop] = _LoopState(client)
+        return state
+
+    def _host_limit(self, state: _LoopState, url: httpx.URL) -> asyncio.Semaphore:
+        key = f"{url.scheme}://{url.netloc.decode()}"
+        limit = state.hosts.get(key)
+        if limit is None:
+            limit = state.hosts[key] = asyncio.Semaphore(
+                self.max_connections_per_host
+            )
+        return limit
+
+    async def get(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> httpx.Response:
+        """
+        GET url, with params merged into its query string, and return the
+        response after retries. Raises httpx errors on transport failure, and
+        TimeoutError once the deadline has passed.
+        """
+        async with self.stream(url, headers, params, timeout, deadline) as response:
+            await response.aread()
+        return response
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        Like get(), but the body is left unread: read it inside the block,
+        e.g. with response.aiter_bytes(). Retries happen before the block is
+        entered; the host slot is held until it exits.
+        """
+        state = self._state()
+        target = httpx.URL(url)
+        if params:
+            # httpx replaces the query string of url with params; keep both
+            target = target.copy_merge_params(params)
+        limit = self._host_limit(state, target)
+        attempt = 0
+        while True:
+            async with limit:
+                try:
+                    request = state.client.build_request(
+                        "GET",
+                        target,
+                        headers=headers,
+                        timeout=time_left(deadline, timeout),
+                    )
+                    response = await state.client.send(request, stream=True)
+                except httpx.TransportError as e:
+                    if attempt >= self.retries:
+                        raise
+                    reason = repr(e)
+                else:
+                    if (
+                        response.status_code not in RETRY_STATUSES
+                        or attempt >= self.retries
+                    ):
+                        try:
+                            yield response
+                        finally:
+                            await response.aclose()
+                        return
+                    await response.aclose()
+                    reason = f"status {response.status_code}"
+            attempt += 1
+            delay = self.backoff_factor * 2 ** (attempt - 1)
+            logger.warning(
+                f"GET {url} failed ({reason}). Retry {attempt} of {self.retries} in {delay:.1f}s."
+            )
+            await asyncio.sleep(min(delay, time_left(deadline, delay)))
+
+    async def aclose(self) -> None:
+        """Closes the connections of the running event loop."""
+        state = self._loops.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.client.aclose()
+
+
+_shared: Optional[HttpClient] = None
+
+
+def shared_client() -> HttpClient:
+    """The HttpClient used by adapters unless one is passed in."""
+    global _shared
+    if _shared is None:
+        _shared = HttpClient()
+    return _shared
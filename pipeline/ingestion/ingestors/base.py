@@ -4,5 +4,7 @@ from models.ingestion import IngestSourceConfig, OutputData
 
 class IngestionMethod(ABC):
     @abstractmethod
-    async def run(self, sources: list[IngestSourceConfig]) -> OutputData:
+    async def run(
+        self, sources: list[IngestSourceConfig], deadline: float | None = None
+    ) -> OutputData:
         pass
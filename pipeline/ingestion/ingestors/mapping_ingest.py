@@ -3,7 +3,9 @@ from models.ingestion import IngestSourceConfig, OutputData
 
 
 class MLIngestionStrategy(IngestionMethod):
-    async def run(self, sources: list[IngestSourceConfig]) -> OutputData:
+    async def run(
+        self, sources: list[IngestSourceConfig], deadline: float | None = None
+    ) -> OutputData:
         # TODO: Add ML-based logic (e.g., deduplication, entity linking, classification)
         return OutputData(
             records=[],  # Placeholder
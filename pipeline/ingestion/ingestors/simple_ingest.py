@@ -1,79 +1,205 @@
+import asyncio
+import time
+from typing import Any
+
+import metrics
 from config import settings
 
 from ingestion.adapters.api_adapter import ApiAdapter
 from ingestion.adapters.file_adapter import FileAdapter
 from ingestion.adapters.web_scraper_adapter import WebScraperAdapter
+from ingestion.errors import classify
+from ingestion.http_cache import track_stats
 from .base import IngestionMethod
 from models.ingestion import (
     AdapterRecord,
+    ErrorClass,
     IngestSourceConfig,
     SourceType,
     ApiConfig,
     FileConfig,
     ScrapeConfig,
     OutputData,
+    SourceError,
 )
 from loguru import logger
 
+# bound once: recording must not build label tuples per source
+_FETCH_SECONDS = {t: metrics.SOURCE_FETCH_DURATION.labels(t.value) for t in SourceType}
+_RECORDS = {t: metrics.RECORDS_INGESTED.labels(t.value) for t in SourceType}
+_ERRORS = {
+    (t, c): metrics.SOURCE_ERRORS.labels(t.value, c.value)
+    for t in SourceType
+    for c in ErrorClass
+}
 
-class SimpleIngestionStrategy(IngestionMethod):
-    async def run(self, sources: list[IngestSourceConfig]) -> OutputData:
-        results: list[AdapterRecord] = []
-        # TODO: find better way to check config type and property
-        for source in sources:
-            try:
-                match source.type:
-                    case SourceType.API:
-                        config = source.parsed_config
-                        assert isinstance(config, ApiConfig), (
-                            f"Wrong config type for source {source.type}: {config}, get type {type(config)}"
-                        )
-                        adapter = ApiAdapter(
-                            url=config.url,
-                            headers=config.headers,
-                            timeout=config.timeout or settings.DEFAULT_API_TIMEOUT,
-                            token=config.token,
-                        )
-                        records = await adapter.fetch()
 
-                    case SourceType.FILE:
-                        config = source.parsed_config
-                        assert isinstance(config, FileConfig), (
-                            f"Wrong config type for source {source.type}: {config}, get type {type(config)}"
-                        )
-                        adapter = FileAdapter(upload=config.upload)
-                        records = await adapter.fetch()
+class SimpleIngestionStrategy(IngestionMethod):
+    """
+    Fetches the sources of a run concurrently, at most max_concurrency at a
+    time, so a run takes about as long as its slowest source. A failing
+    source is logged and reported in OutputData.errors without affecting the
+    others; records are merged in source order.
+    """
 
-                    case SourceType.SCRAPE:
-                        config = source.parsed_config
-                        assert isinstance(config, ScrapeConfig), (
-                            f"Wrong config type for source {source.type}: {config}, get type {type(config)}"
-                        )
-                        adapter = WebScraperAdapter(
-                            urls=config.urls,
-                            api_key=config.api_key,
-                            schema_file=config.schema_file,
-                            prompt=config.prompt or settings.DEFAULT_SCRAPER_PROMPT,
-                            llm_provider=config.llm_provider
-                            or settings.DEFAULT_SCRAPER_LLM_PROVIDER,
-                            output_format=config.output_format or "json",
-                            verbose=config.verbose or False,
-                            cache_mode=config.cache_mode
-                            or settings.DEFAULT_SCRAPER_CACHE_MODE,
-                        )
-                        records = await adapter.fetch()
+    def __init__(self, max_concurrency: int | None = None):
+        self.max_concurrency = max(
+            1, max_concurrency or settings.INGEST_MAX_CONCURRENT_SOURCES
+        )
 
-                results.extend(records)
+    async def run(
+        self, sources: list[IngestSourceConfig], deadline: float | None = None
+    ) -> OutputData:
+        limit = asyncio.Semaphore(self.max_concurrency)
+        tasks = [
+            asyncio.create_task(self._ingest_source(index, source, deadline, limit))
+            for index, source in enumerate(sources)
+        ]
+        try:
+            outcomes = await asyncio.gather(*tasks)
+        finally:
+            # on a deadline, stop the sources still running and let them close
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
-            except ValueError as ve:
-                logger.error(f"Configuration error for source {source.type}: {ve}")
-            except Exception as e:
-                logger.error(
-                    f"Failed to ingest from source {source.type}: {e}", exc_info=True
-                )
+        results: list[AdapterRecord] = []
+        errors: list[SourceError] = []
+        timings: list[dict[str, Any]] = []
+        cache = {"hits": 0, "misses": 0}
+        for records, error, timing in outcomes:
+            results.extend(records)
+            if error is not None:
+                errors.append(error)
+            timings.append(timing)
+            for result, count in timing.get("cache", {}).items():
+                cache[result] += count
 
         return OutputData(
             records=results,
             unified=False,
-            metadata={"source_count": len(sources), "record_count": len(results)},
+            metadata={
+                "source_count": len(sources),
+                "record_count": len(results),
+                "sources": timings,
+                "http_cache": cache,
+            },
+            errors=errors,
+        )
+
+    async def _ingest_source(
+        self,
+        index: int,
+        source: IngestSourceConfig,
+        deadline: float | None,
+        limit: asyncio.Semaphore,
+    ) -> tuple[list[AdapterRecord], SourceError | None, dict[str, Any]]:
+        """
+        Fetches one source. Returns its records, its error if it failed, and
+        its timing for the run metadata. Only TimeoutError (the run deadline)
+        is raised.
+        """
+        records: list[AdapterRecord] = []
+        error: SourceError | None = None
+        with track_stats() as cache:
+            async with limit:
+                start = time.perf_counter()
+                try:
+                    records = await self._fetch(source, deadline)
+                    _RECORDS[source.type].inc(len(records))
+                except TimeoutError:
+                    # the run is out of time: fail it rather than skip the source
+                    _ERRORS[(source.type, ErrorClass.TIMEOUT)].inc()
+                    raise
+                except ValueError as ve:
+                    logger.error(f"Configuration error for source {source.type}: {ve}")
+                    error = self._source_error(index, source, ve)
+                except Exception as e:
+                    logger.error(
+                        f"Failed to ingest from source {source.type}: {e}",
+                        exc_info=True,
+                    )
+                    error = self._source_error(index, source, e)
+                finally:
+                    elapsed = time.perf_counter() - start
+                    _FETCH_SECONDS[source.type].observe(elapsed)
+        timing = {
+            "index": index,
+            "type": source.type.value,
+            "seconds": round(elapsed, 6),
+            "record_count": len(records),
+            "ok": error is None,
+        }
+        if cache.hits or cache.misses:
+            timing["cache"] = {"hits": cache.hits, "misses": cache.misses}
+        return records, error, timing
+
+    @staticmethod
+    async def _fetch(
+        source: IngestSourceConfig, deadline: float | None
+    ) -> list[AdapterRecord]:
+        # TODO: find better way to check config type and property
+        match source.type:
+            case SourceType.API:
+                config = source.parsed_config
+                assert isinstance(config, ApiConfig), (
+                    f"Wrong config type for source {source.type}: {config}, get type {type(config)}"
+                )
+                adapter = ApiAdapter(
+                    url=config.url,
+                    headers=config.headers,
+                    timeout=config.timeout or settings.DEFAULT_API_TIMEOUT,
+                    token=config.token,
+                    deadline=deadline,
+                    pagination=config.pagination,
+                    stream=config.stream,
+                )
+                return await adapter.fetch()
+
+            case SourceType.FILE:
+                config = source.parsed_config
+                assert isinstance(config, FileConfig), (
+                    f"Wrong config type for source {source.type}: {config}, get type {type(config)}"
+                )
+                adapter = FileAdapter(
+                    upload=config.upload,
+                    deadline=deadline,
+                    chunk_rows=config.chunk_rows or settings.FILE_CHUNK_ROWS,
+                    blob_id=config.blob_id,
+                    filename=config.filename,
+                )
+                return await adapter.fetch()
+
+            case SourceType.SCRAPE:
+                config = source.parsed_config
+                assert isinstance(config, ScrapeConfig), (
+                    f"Wrong config type for source {source.type}: {config}, get type {type(config)}"
+                )
+                adapter = WebScraperAdapter(
+                    urls=config.urls,
+                    api_key=config.api_key,
+                    schema_file=config.schema_file,
+                    prompt=config.prompt or settings.DEFAULT_SCRAPER_PROMPT,
+                    llm_provider=config.llm_provider
+                    or settings.DEFAULT_SCRAPER_LLM_PROVIDER,
+                    output_format=config.output_format or "json",
+                    verbose=config.verbose or False,
+                    cache_mode=config.cache_mode or settings.DEFAULT_SCRAPER_CACHE_MODE,
+                    deadline=deadline,
+                )
+                return await adapter.fetch()
+
+        return []
+
+    @staticmethod
+    def _source_error(
+        index: int, source: IngestSourceConfig, error: Exception
+    ) -> SourceError:
+        error_class = classify(error)
+        _ERRORS[(source.type, error_class)].inc()
+        return SourceError(
+            index=index,
+            source_type=source.type,
+            error=str(error),
+            error_class=error_class,
         )
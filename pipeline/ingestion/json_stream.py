@@ -0,0 +1,281 @@
+"""
+Incremental decoding of the items of a JSON array from a byte stream, so a
+large response is never held whole, as text or as decoded objects.
+"""
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Optional
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# characters that matter when finding the end of a value
+_STRUCTURE = re.compile(r'[\[\]{}"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r"[ \t\n\r,\]}]")
+# characters a number may go on with
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+_DECODER = json.JSONDecoder()
+
+
+def _scan(
+    buf: str, i: int, scalar: bool, depth: int, in_string: bool
+) -> tuple[Optional[int], int, int, bool]:
+    """
+    Scan for the end of a value from i, with the state left by an earlier
+    scan. Returns the index just past the value, or None with the state to
+    resume from once the buffer has more text.
+    """
+    while True:
+        if in_string:
+            match = _STRING_SPECIAL.search(buf, i)
+            if match is None:
+                return None, len(buf), depth, in_string
+            if match.group() == "\\":
+                if match.end() >= len(buf):
+                    # see the escape again with more text
+                    return None, match.start(), depth, in_string
+                i = match.end() + 1
+                continue
+            in_string = False
+            i = match.end()
+            if depth == 0:
+                return i, i, depth, in_string
+        elif scalar:
+            match = _SCALAR_END.search(buf, i)
+            if match is None:
+                return None, len(buf), depth, in_string
+            return match.start(), match.start(), depth, in_string
+        else:
+            match = _STRUCTURE.search(buf, i)
+            if match is None:
+                return None, len(buf), depth, in_string
+            i = match.end()
+            char = match.group()
+            if char == '"':
+                in_string = True
+            elif char in "[{":
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return i, i, depth, in_string
+
+
+class JsonStreamError(ValueError):
+    """The body is not valid JSON, or has no list or dict at the items path."""
+
+
+class JsonArrayStream:
+    """
+    Yields the items of the array at `items_path` (a dotted path of object
+    keys, e.g. "data.items"; the body itself when unset) in batches while
+    reading the body chunk by chunk. Only the current chunk of text, and an
+    item longer than a chunk, are buffered.
+
+    A dict at the items path is yielded as one item. The rest of the
+    document, with the items replaced by an empty list, is kept in `body`
+    once the items are exhausted (e.g. for a cursor that follows them).
+    """
+
+    def __init__(self, chunks: AsyncIterable[bytes], items_path: Optional[str] = None):
+        self._chunks = aiter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.path = items_path.split(".") if items_path else []
+        self.body: Any = None
+
+    def _error(self, message: str) -> JsonStreamError:
+        return JsonStreamError(f"{message} (at offset {self._pos} of the buffer)")
+
+    async def _fill(self) -> bool:
+        """Read the next chunk into the buffer; False at the end of the body."""
+        # drop what has been consumed: the buffer only holds the current value
+        self._buf = self._buf[self._pos :]
+        self._pos = 0
+        if self._eof:
+            return False
+        try:
+            chunk = await anext(self._chunks)
+        except StopAsyncIteration:
+            self._eof = True
+            self._buf += self._decoder.decode(b"", final=True)
+            return False
+        self._buf += self._decoder.decode(chunk)
+        return True
+
+    async def _peek(self) -> str:
+        """The next non-whitespace character, consuming the whitespace; "" at EOF."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not await self._fill():
+                return ""
+
+    async def _value_end(self) -> int:
+        """Index just past the value at the read position, reading on as needed."""
+        first = self._buf[self._pos]
+        scalar = first not in '{["'
+        in_string = first == '"'
+        depth = 0 if scalar or in_string else 1
+        i = self._pos + 1
+        while True:
+            end, i, depth, in_string = _scan(self._buf, i, scalar, depth, in_string)
+            if end is not None:
+                return end
+            # _fill shifts the buffer to start at the read position
+            offset = i - self._pos
+            if not await self._fill():
+                if scalar:
+                    return len(self._buf)
+                raise self._error("Unexpected end of JSON body")
+            i = self._pos + offset
+
+    async def _read_value(self) -> Any:
+        if await self._peek() == "":
+            raise self._error("Unexpected end of JSON body")
+        end = await self._value_end()
+        text = self._buf[self._pos : end]
+        self._pos = end
+        try:
+            return json.loads(text)
+        except ValueError as e:
+            raise JsonStreamError(str(e)) from e
+
+    async def _expect(self, char: str) -> None:
+        if await self._peek() != char:
+            raise self._error(f"Expected '{char}'")
+        self._pos += 1
+
+    async def _member(self, first: bool) -> Optional[str]:
+        """The key of the next member of an open object, None at its end."""
+        char = await self._peek()
+        if char == "}":
+            self._pos += 1
+            return None
+        if not first:
+            await self._expect(",")
+        key = await self._read_value()
+        if not isinstance(key, str):
+            raise self._error("Expected an object key")
+        await self._expect(":")
+        return key
+
+    async def _finish(self, obj: dict, first: bool) -> None:
+        """Read the remaining members of an open object into obj."""
+        while (key := await self._member(first)) is not None:
+            obj[key] = await self._read_value()
+            first = False
+
+    async def _array_items(self) -> AsyncIterator[list[Any]]:
+        """
+        The items of the open array at the read position, a list per chunk.
+        Items complete in the buffer are decoded in place by the C decoder;
+        the item cut off by the end of the buffer is read on its own.
+        """
+        while True:
+            buf = self._buf
+            i = self._pos
+            batch: list[Any] = []
+            closed = False
+            while True:
+                i = _WHITESPACE.match(buf, i).end()
+                if i >= len(buf):
+                    break
+                if buf[i] in ",]}:":
+                    self._pos = i
+                    raise self._error("Expected a value")
+                try:
+                    item, end = _DECODER.raw_decode(buf, i)
+                except ValueError:
+                    break  # cut off, or invalid: _read_value tells which
+                if (
+                    isinstance(item, (int, float))
+                    and _NUMBER_TAIL.match(buf, end).end() >= len(buf)
+                ):
+                    break  # a number may go on in the next chunk, e.g. "2." "5"
+                i = _WHITESPACE.match(buf, end).end()
+                if i >= len(buf):
+                    break
+                if buf[i] not in ",]":
+                    self._pos = i
+                    raise self._error("Expected ',' or ']'")
+                batch.append(item)
+                closed = buf[i] == "]"
+                i = self._pos = i + 1
+                if closed:
+                    break
+            if batch:
+                yield batch
+                del batch
+            if closed:
+                return
+            item = await self._read_value()
+            char = await self._peek()
+            if char not in (",", "]"):
+                raise self._error("Expected ',' or ']'")
+            self._pos += 1
+            yield [item]
+            if char == "]":
+                return
+
+    async def batches(self) -> AsyncIterator[list[Any]]:
+        """The items, in lists of those decoded from one buffer of text."""
+        try:
+            async for batch in self._items():
+                yield batch
+        except UnicodeDecodeError as e:
+            raise JsonStreamError(f"Invalid UTF-8 in JSON body: {e}") from e
+
+    async def _items(self) -> AsyncIterator[list[Any]]:
+        # objects on the way to the items, outermost first, left open
+        frames: list[dict] = []
+        found = True
+        for depth, key in enumerate(self.path):
+            await self._expect("{")
+            obj: dict = {}
+            if frames:
+                frames[-1][self.path[depth - 1]] = obj
+            else:
+                self.body = obj
+            frames.append(obj)
+            first = True
+            while (member := await self._member(first)) not in (None, key):
+                obj[member] = await self._read_value()
+                first = False
+            if member is None:
+                # no such key: this object is closed, its parents are not
+                frames.pop()
+                found = False
+                break
+
+        if found:
+            char = await self._peek()
+            if char == "[":
+                self._pos += 1
+                if await self._peek() == "]":
+                    self._pos += 1
+                else:
+                    async for batch in self._array_items():
+                        yield batch
+                items: Any = []
+            elif char == "{":
+                items = None
+                yield [await self._read_value()]
+            else:
+                raise JsonStreamError(
+                    "Unexpected JSON structure: expected list or dict."
+                )
+            if frames:
+                frames[-1][self.path[-1]] = items
+            else:
+                self.body = items
+
+        # each open object has had the key leading to the items read
+        for obj in reversed(frames):
+            await self._finish(obj, first=False)
+        if await self._peek() != "":
+            raise self._error("Extra data after the JSON body")
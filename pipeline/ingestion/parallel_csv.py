@@ -0,0 +1,175 @@
+"""
+Parallel parsing of large CSV files: the file is split into byte ranges
+ending at row boundaries, the ranges are parsed in a pool of worker
+processes, and their rows are put back together in file order.
+"""
+
+import io
+import mmap
+import multiprocessing
+import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice, repeat
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from config import settings
+from services import csv_worker
+
+Rows = List[Dict[str, Any]]
+
+# A quoted field: a quote at the start of a field up to the quote closing
+# it, "" standing for a quote within; unclosed, it runs to the end of file.
+_QUOTED = re.compile(rb'"[^"]*+(?:""[^"]*+)*+"?')
+# Text outside quoted fields: anything but quotes, whole quoted fields, and
+# quotes within an unquoted field (e.g. 12" pipe), which are just text to
+# CSV readers. It stops at a quote opening a field that does not close
+# within the text matched against.
+_OUTSIDE = re.compile(
+    rb'(?:[^"]++|(?<![^,\n])"[^"]*+(?:""[^"]*+)*+"|(?<=[^,\n])")*+'
+)
+
+
+def _row_end(data: Any, pos: int) -> int:
+    """
+    Index just past the first newline from pos that is outside quoted
+    fields; pos must be outside them (a row boundary, or a quote opening a
+    field).
+    """
+    while True:
+        newline = data.find(b"\n", pos)
+        if newline == -1:
+            return len(data)
+        pos = _OUTSIDE.match(data, pos, newline).end()
+        if pos == newline:
+            return newline + 1
+        # a quoted field opens at pos and holds the newline
+        pos = _QUOTED.match(data, pos).end()
+
+
+def split_ranges(data: Any, target_bytes: int) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    The end of the header row of a CSV file, and byte ranges of about
+    target_bytes covering the rows after it, each ending at a row boundary.
+    """
+    size = len(data)
+    header_end = start = _row_end(data, 0)
+    ranges = []
+    while start < size:
+        cut = start + target_bytes
+        if cut >= size:
+            ranges.append((start, size))
+            break
+        # start is a row boundary; this stops short of cut only at a quoted
+        # field open at cut, whose end is then past cut
+        end = _row_end(data, _OUTSIDE.match(data, start, cut).end())
+        ranges.append((start, end))
+        start = end
+    return header_end, ranges
+
+
+class CsvParsePool:
+    """
+    Parses CSV files in a pool of worker processes, range_bytes at a time.
+
+    The rows are exactly those FileAdapter reads from the file on its own:
+    before any rows are converted, each range is parsed once for the
+    column types inferred from it. Where all ranges agree, that is the type
+    inferred over the whole file; a column whose types differ is inferred
+    over the whole file in this process. The ranges are then parsed with
+    those types, a few ahead of the one being yielded.
+    """
+
+    def __init__(
+        self, workers: int, range_bytes: int = settings.FILE_PARSE_RANGE_BYTES
+    ):
+        self.workers = workers
+        self.range_bytes = range_bytes
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=csv_worker.init_worker,
+        )
+        logger.info(f"CsvParsePool started with {workers} workers.")
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _column_types(
+        self, path: str, names: List[str], ranges: List[Tuple[int, int]]
+    ) -> Dict[str, Any]:
+        starts, ends = zip(*ranges)
+        schemas = list(
+            self._pool.map(
+                csv_worker.range_schema, repeat(path), starts, ends, repeat(names)
+            )
+        )
+        types, mixed = {}, []
+        for i, name in enumerate(names):
+            seen = {schema.field(i).type for schema in schemas}
+            if len(seen) == 1:
+                types[name] = seen.pop()
+            else:
+                mixed.append(name)
+        if mixed:
+            logger.info(f"Inferring the types of columns {mixed} over the whole file")
+            schema = csv_worker.read_raw(path, include_columns=mixed).schema
+            types.update(zip(schema.names, schema.types))
+        return csv_worker.column_types(types)
+
+    def chunks(self, path: str, chunk_rows: int) -> Iterator[Rows]:
+        """The rows of the CSV file at path, chunk_rows at a time. Blocking."""
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                header_end, ranges = split_ranges(data, self.range_bytes)
+                header = data[:header_end]
+        names = csv_worker.read_raw(io.BytesIO(header)).column_names
+        if not ranges:
+            return
+        types = self._column_types(path, names, ranges)
+        logger.info(f"Parsing {path} in {len(ranges)} ranges")
+
+        def submit(start: int, end: int) -> Future:
+            return self._pool.submit(
+                csv_worker.parse_range, path, start, end, names, types
+            )
+
+        todo = iter(ranges)
+        pending = deque(submit(*r) for r in islice(todo, self.workers + 1))
+        try:
+            while pending:
+                rows = pending.popleft().result()
+                if (next_range := next(todo, None)) is not None:
+                    pending.append(submit(*next_range))
+                for start in range(0, len(rows), chunk_rows):
+                    yield rows[start : start + chunk_rows]
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+_shared: Optional[CsvParsePool] = None
+
+
+def shared_parse_pool() -> Optional[CsvParsePool]:
+    """
+    The CsvParsePool used by FileAdapter unless one is passed in; None if
+    FILE_PARSE_WORKERS is below 2 or pyarrow is not installed.
+    """
+    global _shared
+    if (
+        _shared is None
+        and settings.FILE_PARSE_WORKERS > 1
+        and csv_worker.PYARROW_AVAILABLE
+    ):
+        _shared = CsvParsePool(settings.FILE_PARSE_WORKERS)
+    return _shared
+
+
+def shutdown_parse_pool() -> None:
+    global _shared
+    if _shared is not None:
+        _shared.shutdown()
+        _shared = None